@@ -3,6 +3,7 @@
 #
 
 import boto3  # access to Amazon Web Services (AWS)
+from boto3.s3.transfer import TransferConfig
 from botocore import UNSIGNED
 from botocore.client import Config
 
@@ -11,86 +12,91 @@ from configparser import ConfigParser
 import logging
 import sys
 
-def mk_suffix( conttype ):
-    labels = conttype.split( sep='/' )
-    suffix = '.unknown'
-    if len( labels ) < 2:
-        return suffix
-
-    if labels[0] == 'image':
-        if labels[1] == 'jpeg':
-                suffix = '.jpg'
-    elif labels[0] == 'text':
-        if labels[1] == 'plain':
-            suffix = '.txt'
-        elif labels[1].startswith( 'x-python' ):
-            suffix = '.py'
-    elif labels[0] == 'application':
-        if labels[1] in [ 'json', 'pdf', 'xml', 'zip' ]:
-            suffix = '.' + labels[1]
-
-    return suffix
+from mimeext import ext_from_ct
 
 #
-# eliminate traceback so we just get error message:
+# parallel ranged GETs for anything over the multipart threshold;
+# s3transfer writes them to a temp file and renames it into place
+# once every part has arrived. Each part in flight needs its own
+# connection, so the client's pool is sized to match:
 #
-sys.tracebacklimit = 0
+MAX_POOL = 16
 
-try:
-    print("**Starting**")
-    print()
+TRANSFER_CFG = TransferConfig(
+    multipart_threshold=8*1024*1024,
+    multipart_chunksize=8*1024*1024,
+    max_concurrency=MAX_POOL,
+    io_chunksize=256*1024,
+    use_threads=True
+)
+
+#
+# main: errors are reported as a short message, not a traceback
+#
+def main():
+    bucket_name = region_name = ''
+
+    try:
+        print("**Starting**")
+        print()
      
-    #
-    # setup AWS based on config file:
-    #
-    config_file = 's3-config.ini'    
-    configur = ConfigParser()
-    configur.read(config_file)
-
-    #
-    # get web server URL from config file:
-    #
-    bucket_name = configur.get('bucket', 'bucket_name')
-    region_name = configur.get('bucket', 'region_name')
-
-    #
-    # gain access to CS 310's public photoapp bucket:
-    #
-    s3 = boto3.resource(
-        's3',
-        region_name=region_name,
-        # enables access to public objects:
-        config=Config(
-            retries={ 'max_attempts': 3, 'mode': 'standard' },
-            signature_version=UNSIGNED
+        #
+        # setup AWS based on config file:
+        #
+        config_file = 's3-config.ini'    
+        configur = ConfigParser()
+        configur.read(config_file)
+
+        #
+        # get web server URL from config file:
+        #
+        bucket_name = configur.get('bucket', 'bucket_name')
+        region_name = configur.get('bucket', 'region_name')
+
+        #
+        # gain access to CS 310's public photoapp bucket; the low-level
+        # client skips the resource layer's lazy-loading round-trips:
+        #
+        s3c = boto3.client(
+            's3',
+            region_name=region_name,
+            # enables access to public objects:
+            config=Config(
+                retries={ 'max_attempts': 3, 'mode': 'standard' },
+                max_pool_connections=MAX_POOL,
+                signature_version=UNSIGNED
+            )
         )
-    )
 
-    bucket = s3.Bucket(bucket_name)
+        #
+        # Download image requested by user:
+        #
+        imagename = input("Enter image to download without extension> ")
 
-    #
-    # Download image requested by user:
-    #
-    imagename = input("Enter image to download without extension> ")
+        head = s3c.head_object( Bucket=bucket_name, Key=imagename )
 
-    metadata = s3.Object( bucket_name, imagename )
+        local_filename = imagename  # same name locally
+        if imagename.find( '.' ) < 0:
+            local_filename += ext_from_ct( head['ContentType'] )
 
-    local_filename = imagename  # same name locally
-    if imagename.find( '.' ) < 0:
-        local_filename += mk_suffix( metadata.content_type )
+        s3c.download_file(
+            bucket_name, imagename, local_filename, Config=TRANSFER_CFG
+        )
 
-    bucket.download_file(imagename, local_filename)
+        print() 
+        print("Success, image downloaded to '" + local_filename + "'")
 
-    print() 
-    print("Success, image downloaded to '" + local_filename + "'")
+        print()
+        print("**Done**")
 
-    print()
-    print("**Done**")
+    except Exception as err:
+        print()
+        print("ERROR:")
+        print( " Bucket: " + bucket_name ),
+        print( " Region: " + region_name ),
+        print( " Msg: ", str(err))
+        sys.exit(1)
 
-except Exception as err:
-    print()
-    print("ERROR:")
-    print( " Bucket: " + bucket_name ),
-    print( " Region: " + region_name ),
-    print( " Msg: ", str(err))
 
+if __name__ == '__main__':
+    main()
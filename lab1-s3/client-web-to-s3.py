@@ -6,33 +6,95 @@
 #
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from configparser import ConfigParser
-import xml.etree.ElementTree as xmlET
-import time
+try:
+    # C-accelerated parser when available, same API for iterparse/tostring
+    from lxml import etree as xmlET
+except ImportError:
+    import xml.etree.ElementTree as xmlET
+import shutil
+from io import BytesIO
+import asyncio
+import sys
+
+from mimeext import ext_from_ct
 
 def mk_suffix( conttype ):
-    labels = conttype.split( sep='/' )
-    suffix = '.unknown'
-    if len( labels ) < 2:
-        return suffix
-
-    if labels[0] == 'image':
-        if labels[1] == 'jpeg':
-                suffix = '.jpg'
-    elif labels[0] == 'text':
-        if labels[1] == 'plain':
-            suffix = '.txt'
-        elif labels[1].startswith( 'x-python' ):
-            suffix = '.py'
-    elif labels[0] == 'application':
-        if labels[1] in [ 'json', 'pdf', 'xml', 'zip' ]:
-            suffix = '.' + labels[1]
-
-    return suffix
+    return ext_from_ct( conttype )
+
+def error_msg_from_body( body ):
+    #
+    # scan the raw bytes and stop at the first <Message>, rather than
+    # decoding the body to str and building the whole tree:
+    #
+    for _, el in xmlET.iterparse( BytesIO( body ), events=( 'end', ) ):
+        if el.tag.endswith( 'Message' ):
+            return el.text or ''
+        el.clear()
+    return ''
 
 def error_msg_from_resp( response ):
-    e_msg = xmlET.fromstring( response.text ).find( 'Message' ).text
-    return e_msg
+    return error_msg_from_body( response.content )
+
+#
+# One session for the whole script, so retries reuse the keep-alive
+# connection; urllib3 handles the retries and exponential backoff.
+#
+MAX_RETRIES = 3
+
+SESSION = requests.Session()
+SESSION.mount(
+    'https://',
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=4,
+        max_retries=Retry(
+            total=MAX_RETRIES,
+            backoff_factor=1,
+            status_forcelist=( 500, 502, 503, 504 ),
+            # hand back the last response rather than raising:
+            raise_on_status=False
+        )
+    )
+)
+
+#
+# Batched downloads: many GETs in flight at once over a bounded
+# pool of keep-alive connections, each body streamed to disk.
+# Returns a list of (imagename, status code, local filename or
+# error message) tuples, in the order the names were given.
+#
+async def download_many( imagenames, url_base, concurrency=16 ):
+    import aiohttp  # only needed for batched downloads
+
+    sem = asyncio.Semaphore( concurrency )
+    connector = aiohttp.TCPConnector( limit=concurrency, keepalive_timeout=60 )
+
+    async with aiohttp.ClientSession( connector=connector ) as session:
+
+        async def download_one( imagename ):
+            try:
+                async with sem, session.get( url_base + "/" + imagename ) as resp:
+                    if resp.status != 200:
+                        body = await resp.read()
+                        return ( imagename, resp.status, error_msg_from_body( body ) )
+
+                    local_filename = imagename
+                    conttype = resp.headers.get( 'Content-Type', None )
+                    if imagename.find( '.' ) < 0 and conttype:
+                        local_filename += mk_suffix( conttype )
+
+                    with open( local_filename, 'wb' ) as file:
+                        async for chunk in resp.content.iter_chunked( 256*1024 ):
+                            file.write( chunk )
+                    return ( imagename, resp.status, local_filename )
+
+            except Exception as exc:
+                return ( imagename, -1, str( exc ) )
+
+        return await asyncio.gather( *[ download_one( n ) for n in imagenames ] )
 
 print("**Starting**")
 print()
@@ -53,7 +115,25 @@ endpoint = configur.get('webserver', 'endpoint')
 # Call S3 web server to download image requested by user:
 #
 #imagename = input("Enter image to download (e.g. 'degu.jpg')> ")
-imagename = input("Enter image to download without extension> ").strip()
+imagenames = input("Enter image(s) to download without extension> ").split()
+
+if len( imagenames ) > 1:
+    #
+    # several images requested, download them concurrently:
+    #
+    for name, status_code, info in asyncio.run( download_many( imagenames, endpoint ) ):
+        if status_code == 200:
+            print("Success, image downloaded to '" + info + "'")
+        else:
+            print("ERROR:")
+            print(" URL: " + endpoint + "/" + name)
+            print(" Msg: " + info)
+
+    print()
+    print("**Done**")
+    sys.exit( 0 )
+
+imagename = imagenames[0] if imagenames else ''
 
 #
 # Error/retry test
@@ -64,28 +144,18 @@ url = endpoint + "/" + imagename
 
 #print( url )
 
-MAX_RETRIES = 3
-for retry in range( 1, MAX_RETRIES+1 ):
-    try:
-        response = requests.get( url )
-        stat = response.status_code
-        if stat == 200 or stat == 404:
-            break
-    except Exception as exc:
-        if ( retry == MAX_RETRIES ):
-            response = requests.models.Response()
-            response.status_code = -1
-            root = xmlET.Element( 'Error' )
-            xmlET.SubElement( root, 'Message' ).text = str( exc )
-            response._content = xmlET.tostring( root, encoding='UTF-8' )
-    finally:
-        pass
-    '''
-    Since the `try` block otherwise constitutes the entire loop body,
-    the `sleep()` call can be placed after the `try` block instead of 
-    under `finally`.
-    '''
-    time.sleep(retry)
+try:
+    # stream the body so large images go straight to disk:
+    response = SESSION.get( url, timeout=( 3, 30 ), stream=True )
+except Exception as exc:
+    #
+    # retries exhausted, synthesize an S3-style error response:
+    #
+    response = requests.models.Response()
+    response.status_code = -1
+    root = xmlET.Element( 'Error' )
+    xmlET.SubElement( root, 'Message' ).text = str( exc )
+    response._content = xmlET.tostring( root, encoding='UTF-8' )
 
 #
 # process the response:
@@ -108,12 +178,14 @@ if status_code == 200:
             suffix = mk_suffix( conttype )
             imagename += suffix
 
-    with open(imagename, 'wb') as file:
-        file.write(response.content)
+    with response, open(imagename, 'wb') as file:
+        response.raw.decode_content = True
+        shutil.copyfileobj( response.raw, file, length=256*1024 )
     print("Success, image downloaded to '" + imagename + "'")
 else:
     #
-    # error:
+    # error (the XML error body is small, reading it releases
+    # the connection):
     #
     e_msg = error_msg_from_resp( response )
     print("ERROR:")
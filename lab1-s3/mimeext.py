@@ -0,0 +1,20 @@
+#
+# Maps a Content-Type to a file suffix; shared by the lab1 clients
+#
+
+import mimetypes
+
+MIME_TO_EXT = {
+    'image/jpeg':       '.jpg',
+    'text/plain':       '.txt',
+    'application/json': '.json',
+    'application/pdf':  '.pdf',
+    'application/xml':  '.xml',
+    'application/zip':  '.zip',
+}
+
+def ext_from_ct( ct ):
+    base = ct.partition( ';' )[0].strip().lower()
+    if base.startswith( 'text/x-python' ):
+        return '.py'
+    return MIME_TO_EXT.get( base ) or mimetypes.guess_extension( base ) or '.unknown'
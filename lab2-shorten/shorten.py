@@ -8,10 +8,55 @@
 #   Northwestern University
 #
 
-import pymysql
+import contextlib
+import functools
+#
+# prefer the mysqlclient C driver, fall back to pure-Python pymysql;
+# both expose the same DB-API surface used here:
+#
+try:
+  import MySQLdb as _mysql
+  from MySQLdb.constants import CLIENT
+except ImportError:
+  import pymysql as _mysql
+  from pymysql.constants import CLIENT
+import queue
 from configparser import ConfigParser
 
 
+#
+# SQL statements, built once at import:
+#
+_Q_LOOKUP_URL = (
+  "Update shorten Set access_cnt = access_cnt + 1 Where shorturl = %s; "
+  "Select longurl From shorten Where shorturl = %s;"
+)
+_Q_SELECT_STATS = "Select access_cnt From shorten Where shorturl = %s;"
+#
+# insert-if-absent then read back whichever long url owns the short
+# url; relies on a UNIQUE index (or primary key) on shorten.shorturl:
+#
+_Q_PUT_URL = (
+  "Insert Into shorten(shorturl, longurl, access_cnt) Values(%s, %s, 0) "
+  "On Duplicate Key Update shorturl = shorturl; "
+  "Select longurl From shorten Where shorturl = %s;"
+)
+_Q_DELETE_ALL = "Delete From shorten;"
+
+
+###################################################################
+#
+# _load_cfg
+#
+# parse the config file once and cache the [rds] section, so we
+# don't re-read the file on every database call
+#
+@functools.lru_cache(maxsize=4)
+def _load_cfg(path):
+  configur = ConfigParser()
+  configur.read(path)
+  return {'rds': dict(configur['rds'])}
+
 ###################################################################
 #
 # get_dbConn
@@ -22,7 +67,7 @@ from configparser import ConfigParser
 def get_dbConn():
   """
   Reads the configuration info from shorten-config.ini, creates
-  a pymysql connection object based on this info, and returns it
+  a MySQL connection object based on this info, and returns it
 
   Parameters
   ----------
@@ -30,7 +75,7 @@ def get_dbConn():
 
   Returns
   -------
-  pymysql connection object
+  MySQL (mysqlclient or pymysql) connection object
   """
 
   try:
@@ -38,23 +83,30 @@ def get_dbConn():
     # obtain database server config info:
     #
     config_file = 'shorten-config.ini'    
-    configur = ConfigParser()
-    configur.read(config_file)
+    rds = _load_cfg(config_file)['rds']
 
-    endpoint = configur.get('rds', 'endpoint')
-    portnum = int(configur.get('rds', 'port_number'))
-    username = configur.get('rds', 'user_name')
-    pwd = configur.get('rds', 'user_pwd')
-    dbname = configur.get('rds', 'db_name')
+    endpoint = rds['endpoint']
+    portnum = int(rds['port_number'])
+    username = rds['user_name']
+    pwd = rds['user_pwd']
+    dbname = rds['db_name']
 
     #
     # now create connection object and return it:
     #
-    dbConn = pymysql.connect(host=endpoint,
+    dbConn = _mysql.connect(host=endpoint,
                             port=portnum,
                             user=username,
-                            passwd=pwd,
-                            database=dbname)
+                            password=pwd,
+                            database=dbname,
+                            charset='utf8mb4',
+                            #
+                            # single-statement writes commit on their own,
+                            # and get_url sends its update + select as one
+                            # query string:
+                            #
+                            autocommit=True,
+                            client_flag=CLIENT.MULTI_STATEMENTS)
 
     return dbConn
   
@@ -62,7 +114,84 @@ def get_dbConn():
     print("**ERROR in shorten.get_dbConn():")
     print(str(err))
     return None
-  
+
+
+###################################################################
+#
+# connection pool
+#
+# API functions borrow a connection from the pool and hand it back
+# when done, so the TCP + auth handshake is only paid when the pool
+# is empty. Idle connections are pinged (and reconnected if the
+# server dropped them) before being reused.
+#
+_POOL = queue.Queue(maxsize=8)
+
+#
+# get_dbConn() reports a failed connect by returning None; the pool
+# raises instead, so None never reaches a caller or the pool:
+#
+def _new_conn():
+  dbconn = get_dbConn()
+  if dbconn is None:
+    raise ConnectionError("shorten: unable to connect to the database")
+  return dbconn
+
+def _acquire():
+  try:
+    dbconn = _POOL.get_nowait()
+  except queue.Empty:
+    return _new_conn()
+
+  try:
+    #
+    # plain ping(): mysqlclient's takes no reconnect= keyword, so a
+    # dropped connection raises and is replaced below instead:
+    #
+    dbconn.ping()
+    return dbconn
+  except Exception:
+    try:
+      dbconn.close()
+    except Exception:
+      pass
+    return _new_conn()
+
+def _release(dbconn):
+  if dbconn is None:
+    return
+  try:
+    #
+    # connections are autocommit, and put_reset pairs its begin()
+    # with commit()/rollback(), so nothing is left open:
+    #
+    _POOL.put_nowait(dbconn)
+  except Exception:
+    try:
+      dbconn.close()
+    except Exception:
+      pass
+
+@contextlib.contextmanager
+def _pooled_conn():
+  dbconn = _acquire()
+  try:
+    yield dbconn
+  finally:
+    _release(dbconn)
+
+#
+# each pooled connection keeps one cursor for its lifetime, rather
+# than allocating and tearing down a cursor per call:
+#
+@contextlib.contextmanager
+def _cursor(dbconn):
+  cursor = getattr(dbconn, '_shorten_cursor', None)
+  if cursor is None:
+    cursor = dbconn.cursor()
+    dbconn._shorten_cursor = cursor
+  yield cursor
+
 
 ###################################################################
 #
@@ -87,34 +216,20 @@ def get_url(shorturl):
   long URL (string), or empty string if short URL not found
   """
 
-  select_query = """
-    Select longurl 
-    From shorten 
-    Where shorturl = %s;
-  """
-  update_query = """
-    Update shorten 
-    Set access_cnt = access_cnt + 1 
-    Where shorturl = %s;
-  """
- 
-  with get_dbConn() as dbconn:
-    with dbconn.cursor() as cursor:
-
-      longurl = ""
+  #
+  # bump the count and fetch the long url in one round-trip; the
+  # update is a no-op if the short url doesn't exist:
+  #
+  with _pooled_conn() as dbconn:
+    with _cursor(dbconn) as cursor:
 
       try:
-        dbconn.begin()
-        cursor.execute( select_query, [shorturl] )
-        if cursor.rowcount == 1:
-          row = cursor.fetchone()
-          longurl = row[0]
-          cursor.execute( update_query, [shorturl] )
-        dbconn.commit()
-        return longurl
+        cursor.execute( _Q_LOOKUP_URL, [shorturl, shorturl] )
+        cursor.nextset()
+        row = cursor.fetchone()
+        return row[0] if row else ""
 
       except Exception as err:
-        dbconn.rollback()
         print("**ERROR in shorten.get_url():")
         print(str(err))
         return ""
@@ -141,20 +256,13 @@ def get_stats(shorturl):
   the count associated with the short url, -1 if short URL not found
   """
 
-  select_query = """
-    Select access_cnt
-    From shorten
-    Where shorturl = %s;
-  """
-
-  with get_dbConn() as dbconn:
-    with dbconn.cursor() as cursor:
+  with _pooled_conn() as dbconn:
+    with _cursor(dbconn) as cursor:
 
       access_cnt = -1
 
       try:
-        dbconn.begin()
-        cursor.execute( select_query, [shorturl] )
+        cursor.execute( _Q_SELECT_STATS, [shorturl] )
         if cursor.rowcount == 1:
           row = cursor.fetchone()
           access_cnt = row[0]
@@ -193,36 +301,20 @@ def put_shorturl(longurl, shorturl):
   True if successful, False if not
   """
 
-  # test if SHORTURL is in table
-  select_query = """
-    Select longurl
-    From shorten
-    Where shorturl = %s;
-  """
-
-  insert_query = """
-    Insert Into shorten(shorturl, longurl, access_cnt)
-    Values(%s, %s, 0);
-  """
-
-  with get_dbConn() as dbconn:
-    with dbconn.cursor() as cursor:
+  with _pooled_conn() as dbconn:
+    with _cursor(dbconn) as cursor:
 
       try:
-        dbconn.begin()
-        cursor.execute( select_query, [shorturl] )
-        if cursor.rowcount > 0:
-          for row in cursor.fetchall():
-            if row[0] == longurl:
-              return True
-          return False
-        else:
-          cursor.execute( insert_query, [shorturl, longurl] )
-        dbconn.commit()
-        return True
+        #
+        # one round-trip: the insert is a no-op if the short url is
+        # taken, and the select tells us who it belongs to:
+        #
+        cursor.execute( _Q_PUT_URL, [shorturl, longurl, shorturl] )
+        cursor.nextset()
+        row = cursor.fetchone()
+        return row is not None and row[0] == longurl
 
       except Exception as err:
-        dbconn.rollback()
         print("**ERROR in shorten.put_shorturl():")
         print(str(err))
         return False
@@ -248,22 +340,21 @@ def put_reset():
   True if successful, False if not
   """
 
-  delete_query = """
-    Delete 
-    From shorten;
-  """
-
-  with get_dbConn() as dbconn:
-    with dbconn.cursor() as cursor:
+  with _pooled_conn() as dbconn:
+    with _cursor(dbconn) as cursor:
 
       try:
         dbconn.begin()
-        cursor.execute( delete_query )
+        cursor.execute( _Q_DELETE_ALL )
         dbconn.commit()
         return True
       except Exception as err:
         print("**ERROR in shorten.put_reset():")
         print(str(err))
+        try:
+          dbconn.rollback()
+        except Exception:
+          pass
         return False
 
   return False
@@ -73,6 +73,15 @@ class URLShortenerTests(unittest.TestCase):
       success = shorten.put_shorturl(longurl, shorturl)
       self.assertEqual(success, True)
 
+      # but not to remap the short url to a different long url:
+      otherurl = "https://" + str(uuid.uuid4()) + ".html"
+      success = shorten.put_shorturl(otherurl, shorturl)
+      self.assertEqual(success, False)
+
+      # stats and mapping are unchanged:
+      count = shorten.get_stats(shorturl)
+      self.assertEqual(count, 2)
+
       # empty the database:
       success = shorten.put_reset()
       self.assertEqual(success, True)
@@ -6,6 +6,7 @@
 #   Northwestern University
 #
 
+import os
 import photoapp
 import sys
 
@@ -14,33 +15,40 @@ import logging
 LOGFILE = 'log.txt'
 logging.basicConfig(
 	filename=LOGFILE,
-	level=logging.INFO,
+	# WARNING unless asked otherwise, to keep log writes off the call path:
+	level=os.environ.get('PHOTOAPP_LOGLEVEL', 'WARNING').upper(),
 	format='%(asctime)s - %(levelname)s - %(message)s',
 	filemode='w'
 )
 
-#
-# eliminate traceback so we just get error message:
-#
-sys.tracebacklimit = 0
+def main():
+	print()
+	print("**starting**")
+	print()
 
-print()
-print("**starting**")
-print()
+	print("**initialize**")
+	success = photoapp.initialize('photoapp-config.ini', 's3readwrite', 'photoapp-read-write')
+	print(success)
 
-print("**initialize**")
-success = photoapp.initialize('photoapp-config.ini', 's3readwrite', 'photoapp-read-write')
-print(success)
+	print()
 
-print()
+	print("**get_ping**")
+	(M,N) = photoapp.get_ping()
+	print()
+	print(f"M: {M}")
+	print(f"N: {N}")
 
-print("**get_ping**")
-(M,N) = photoapp.get_ping()
-print()
-print(f"M: {M}")
-print(f"N: {N}")
+	print()
+	print("**done**")
+	print()
 
-print()
-print("**done**")
-print()
 
+#
+# report errors as a short message rather than a traceback:
+#
+if __name__ == '__main__':
+	try:
+		main()
+	except Exception as err:
+		print(f"ERROR: {err}")
+		sys.exit(1)
@@ -0,0 +1,11 @@
+--
+-- get_images(userid): lets MySQL find a user's assets and return them
+-- in assetid order straight from the index, instead of scanning the
+-- table and filesorting. InnoDB secondary indexes carry the primary
+-- key, so (userid, assetid) is enough.
+--
+-- Apply once against the photoapp database:
+--   mysql -h <endpoint> -u <admin> -p photoapp < 001_assets_userid_assetid.sql
+--
+
+ALTER TABLE assets ADD INDEX idx_assets_userid_assetid (userid, assetid);
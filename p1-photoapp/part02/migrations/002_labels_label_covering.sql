@@ -0,0 +1,15 @@
+--
+-- get_images_with_label: the search is a substring match
+-- (LIKE '%label%'), so no index can seek on it. This covering index
+-- holds every column the query reads, which lets MySQL scan the narrow
+-- index instead of the labels table rows.
+--
+-- FULLTEXT + MATCH ... AGAINST is not used here. Boolean-mode wildcards
+-- only match word prefixes ('boat*'), so 'boat' would no longer find
+-- 'Sailboat'.
+--
+-- Apply once against the photoapp database:
+--   mysql -h <endpoint> -u <admin> -p photoapp < 002_labels_label_covering.sql
+--
+
+ALTER TABLE labels ADD INDEX idx_labels_label_cover (label, assetid, confidence);
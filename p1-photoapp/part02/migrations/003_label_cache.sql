@@ -0,0 +1,17 @@
+--
+-- post_image: Rekognition labels cached by the SHA-256 of the image
+-- bytes. Uploading the same image again reuses the stored labels and
+-- skips the detect_labels call.
+--
+-- labels holds a JSON array of {"Name": ..., "Confidence": ...}
+-- objects, the same shape detect_labels returns.
+--
+-- Apply once against the photoapp database:
+--   mysql -h <endpoint> -u <admin> -p photoapp < 003_label_cache.sql
+--
+
+CREATE TABLE IF NOT EXISTS label_cache
+(
+    sha256   CHAR(64) NOT NULL PRIMARY KEY,
+    labels   JSON     NOT NULL
+);
@@ -7,99 +7,354 @@
 #   Northwestern University
 #
 
-import logging
-import pymysql
+import functools
+import hashlib
+import json
+import logging as lg
 import os
+import queue
+import random
+import threading
+import time
+import uuid
+from types import MappingProxyType
 import boto3
 
+#
+# prefer the mysqlclient C driver, fall back to pure-Python pymysql;
+# both expose the same DB-API surface used here:
+#
+try:
+  import MySQLdb as _mysql
+  from MySQLdb.cursors import Cursor, SSCursor
+except ImportError:
+  import pymysql as _mysql
+  from pymysql.cursors import Cursor, SSCursor
+
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
+from datetime import datetime, timedelta, timezone
 
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import (
+  retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+)
 
 #
 # module-level varibles:
 #
-PHOTOAPP_CONFIG_FILE = 'set via call to initialize()'
+
+# config values parsed once by initialize(), read-only:
+#   _CFG['s3']  -> bucket_name, region_name
+#   _CFG['rds'] -> endpoint, port_number (int), user_name, user_pwd, db_name
+_CFG = MappingProxyType({})
+
+# shared boto3 objects, built lazily on first use and dropped by
+# initialize(); the S3 resource owns the keep-alive connection pool
+_S3_RESOURCE = None
+_BUCKET = None
+_REKOG = None
+_CLOUDWATCH = None
+_AWS_LOCK = threading.Lock()
+
+# arguments of the last successful initialize(), to skip repeat calls
+_INIT_KEY = None
+
+# S3 transfer config: parallel multipart transfers for large images
+TRANSFER_CFG = TransferConfig(
+  multipart_threshold=8*1024*1024,
+  multipart_chunksize=8*1024*1024,
+  max_concurrency=10,
+  io_chunksize=256*1024,
+  use_threads=True
+)
+
+# get_ping: count bucket objects from the CloudWatch NumberOfObjects
+# metric instead of listing the bucket. O(1), but the metric is only
+# published about once a day, so the count can be stale; off by default
+USE_CLOUDWATCH_COUNT = False
+
+# errors worth retrying: dropped/refused connections, and AWS errors
+# only when throttled or a 5xx (AccessDenied, NoSuchKey, etc. are final)
+_TRANSIENT_ERRORS = (
+  _mysql.OperationalError,
+  _mysql.InterfaceError,
+  ConnectionError
+)
+
+_THROTTLE_CODES = frozenset([
+  'Throttling', 'ThrottlingException', 'ThrottledException',
+  'SlowDown', 'RequestLimitExceeded', 'TooManyRequestsException',
+  'ProvisionedThroughputExceededException', 'RequestThrottled',
+  'RequestTimeout', 'RequestTimeoutException'
+])
+
+def _is_transient(err):
+  if isinstance(err, ClientError):
+    code = err.response.get('Error', {}).get('Code', '')
+    status = err.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+    return code in _THROTTLE_CODES or status == 429 or status >= 500
+  return isinstance(err, _TRANSIENT_ERRORS)
 
 # retry config
 RETRY_3 = retry(
   stop=stop_after_attempt( 3 ),
-  wait=wait_exponential(multiplier=1, min=2, max=30),
+  # full jitter, so clients that failed together don't retry together:
+  wait=wait_random_exponential(multiplier=1, max=20),
+  # only transient failures; ValueError etc. are final:
+  retry=retry_if_exception( _is_transient ),
   reraise=True
 )
 
 ###################################################################
 #
-# get_dbConn
+# circuit breakers
 #
-# create and return connection object, based on configuration
-# information in app config file. You should call close() on 
-# the object when you are done.
+# After fail_max consecutive connectivity failures the breaker
+# opens and every call raises CircuitOpenError immediately, instead
+# of each request sitting through its own retries against a dead
+# service. After reset_timeout seconds one call is let through
+# (half-open): success closes the breaker, failure re-opens it.
 #
-def get_dbConn():
-  """
-  Reads the configuration info from app config file, creates
-  pymysql connection object based on this info, and returns it.
-  You should call close() on the object when you are done.
+class CircuitOpenError(Exception):
+  pass
+
+class _CircuitBreaker:
+  def __init__(self, name, trip_on, fail_max=5, reset_timeout=30):
+    self.name = name
+    self.trip_on = trip_on
+    self.fail_max = fail_max
+    self.reset_timeout = reset_timeout
+    self._state = 'CLOSED'
+    self._failures = 0
+    self._opened_at = 0.0
+    self._lock = threading.Lock()
+
+  def __enter__(self):
+    with self._lock:
+      if self._state == 'OPEN':
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+          raise CircuitOpenError(f"{self.name} unavailable (circuit open)")
+        self._state = 'HALF_OPEN'
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    with self._lock:
+      if exc_type is None:
+        self._state = 'CLOSED'
+        self._failures = 0
+      elif issubclass(exc_type, self.trip_on):
+        self._failures += 1
+        if self._state == 'HALF_OPEN' or self._failures >= self.fail_max:
+          self._state = 'OPEN'
+          self._opened_at = time.monotonic()
+    return False
 
-  Parameters
-  ----------
-  N/A
+_DB_BREAKER = _CircuitBreaker('database', _mysql.OperationalError)
+_S3_BREAKER = _CircuitBreaker('S3', (BotoConnectionError, HTTPClientError))
 
-  Returns
-  -------
-  pymysql connection object
-  """
+###################################################################
+#
+# _load_cfg
+#
+# parse the app config file and return the sections we need.
+# Only initialize() calls this; it copies the values into _CFG so
+# the get_* functions never touch ConfigParser. Parses are cached
+# by (path, mtime, size): re-initializing with an unchanged file
+# costs one stat(), and editing the file invalidates the entry.
+#
+def _cfg_stamp(path):
+  st = os.stat(path)
+  return (st.st_mtime_ns, st.st_size)
+
+def _load_cfg(path):
+  return _parse_cfg(path, *_cfg_stamp(path))
+
+@functools.lru_cache(maxsize=4)
+def _parse_cfg(path, mtime_ns, size):
+  configur = ConfigParser()
+  configur.read(path)
+  return {'rds': dict(configur['rds']), 's3': dict(configur['s3'])}
+
+###################################################################
+#
+# _connect
+#
+# open a new connection to the database server, based on
+# configuration information in app config file. Only the pool
+# below calls this; everyone else goes through get_dbConn().
+#
+def _connect():
 
   try:
     #
     # obtain database server config info:
     #  
-    configur = ConfigParser()
-    configur.read(PHOTOAPP_CONFIG_FILE)
+    rds = _CFG['rds']
 
-    endpoint = configur.get('rds', 'endpoint')
-    portnum = int(configur.get('rds', 'port_number'))
-    username = configur.get('rds', 'user_name')
-    pwd = configur.get('rds', 'user_pwd')
-    dbname = configur.get('rds', 'db_name')
+    endpoint = rds['endpoint']
+    portnum = rds['port_number']
+    username = rds['user_name']
+    pwd = rds['user_pwd']
+    dbname = rds['db_name']
 
     #
     # now create connection object and return it:
     #
-    dbConn = pymysql.connect(
+    dbConn = _mysql.connect(
       host=endpoint, port=portnum,
       user=username,
-      passwd=pwd,
+      password=pwd,
       database=dbname,
+      charset='utf8mb4',
+      use_unicode=True,
+      #
+      # plain tuple rows; the API returns tuples, and dict rows would
+      # cost an allocation per row. Big results opt into SSCursor:
       #
-      # allow execution of a query string with multiple SQL queries:
+      cursorclass=Cursor,
       #
-      client_flag=pymysql.constants.CLIENT.MULTI_STATEMENTS
+      # single statements commit on their own; multi-statement work
+      # opts into a transaction with begin():
+      #
+      autocommit=True
     )
 
     return dbConn
   
   except Exception as err:
-    logging.error("get_dbconn():")
-    logging.error(str(err))
+    lg.error("_connect():")
+    lg.error(str(err))
     raise
 
 
+###################################################################
+#
+# connection pool
+#
+# Borrow a connection with _acquire() and hand it back with
+# _release() instead of calling close(), so the TCP + auth
+# handshake is only paid when the pool is empty. Idle connections
+# are pinged (and reconnected if the server dropped them) before
+# being reused; _connect() is the cold-start path.
+#
+_POOL = queue.Queue(maxsize=8)
+
+def _acquire():
+  try:
+    dbConn = _POOL.get_nowait()
+  except queue.Empty:
+    return _connect()
+
+  try:
+    #
+    # plain ping(): mysqlclient's takes no reconnect= keyword, so a
+    # dropped connection raises and is replaced below instead:
+    #
+    dbConn.ping()
+    return dbConn
+  except Exception:
+    try:
+      dbConn.close()
+    except Exception:
+      pass
+    return _connect()
+
+def _release(dbConn):
+  try:
+    #
+    # connections are autocommit, and every begin() is paired with
+    # commit()/rollback() by its caller, so nothing is left open:
+    #
+    _POOL.put_nowait(dbConn)
+  except Exception:
+    try:
+      dbConn.close()
+    except Exception:
+      pass
+
+def _drain_pool():
+  while True:
+    try:
+      dbConn = _POOL.get_nowait()
+    except queue.Empty:
+      return
+    try:
+      dbConn.close()
+    except Exception:
+      pass
+
+#
+# thin wrapper handed out by get_dbConn(): behaves like the real
+# connection, but close() (and leaving a with block) returns it to
+# the pool instead of tearing it down:
+#
+class _PooledConn:
+  def __init__(self, dbConn):
+    self._dbConn = dbConn
+
+  def __getattr__(self, name):
+    return getattr(self._dbConn, name)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self.close()
+    return False
+
+  def close(self):
+    if self._dbConn is not None:
+      _release(self._dbConn)
+      self._dbConn = None
+
+
+###################################################################
+#
+# get_dbConn
+#
+# return a connection object, based on configuration information
+# in app config file. You should call close() on the object (or
+# use it in a with block) when you are done; this hands it back
+# to the pool for reuse.
+#
+def get_dbConn():
+  """
+  Returns a MySQL connection object from the module's connection
+  pool, opening a new one if the pool is empty. You should call
+  close() on the object when you are done, which returns it to
+  the pool.
+
+  Parameters
+  ----------
+  N/A
+
+  Returns
+  -------
+  MySQL (mysqlclient or pymysql) connection object
+  """
+
+  with _DB_BREAKER:
+    return _PooledConn(_acquire())
+
+
 ###################################################################
 #
 # get_bucket
 #
-# create and return bucket object, based on configuration
-# information in app config file. You should call close() 
-# on the object when you are done.
+# return bucket object, based on configuration information saved
+# by initialize(). The S3 resource and bucket are built on first
+# use and shared by every caller, so there is nothing to close.
+# Resources aren't thread-safe, so S3 calls that may run on several
+# threads at once go through the bucket's low-level client
+# (bkt.meta.client), which is.
 #
 def get_bucket():
   """
-  Reads the configuration info from app config file, creates
-  a bucket object based on this info, and returns it. You 
-  should call close() on the object when you are done.
+  Returns the module's shared bucket object, creating the S3
+  resource and bucket on the first call. Do not close it.
 
   Parameters
   ----------
@@ -110,34 +365,40 @@ def get_bucket():
   S3 bucket object
   """
 
+  global _S3_RESOURCE, _BUCKET
+
+  if _BUCKET is not None:
+    return _BUCKET
+
   try:
-    #
-    # configure S3 access using config file:
-    #  
-    configur = ConfigParser()
-    configur.read(PHOTOAPP_CONFIG_FILE)
-    bucketname = configur.get('s3', 'bucket_name')
-    regionname = configur.get('s3', 'region_name')
-
-    s3 = boto3.resource(
-           's3',
-           region_name=regionname,
-           config = Config(
-             retries = \
-             {
-               'max_attempts': 3,
-               'mode': 'standard'
-             }
-           )
-         )
-
-    bucket = s3.Bucket(bucketname)
-
-    return bucket
+    with _AWS_LOCK:
+      if _BUCKET is None:
+        #
+        # one S3 resource for the whole module, so every caller
+        # reuses the same keep-alive connection pool:
+        #
+        _S3_RESOURCE = boto3.resource(
+                         's3',
+                         region_name=_CFG['s3']['region_name'],
+                         config = Config(
+                           max_pool_connections = max(25, 4 * (os.cpu_count() or 1)),
+                           tcp_keepalive = True,
+                           connect_timeout = 3,
+                           read_timeout = 30,
+                           retries = \
+                           {
+                             'max_attempts': 3,
+                             'mode': 'standard'
+                           }
+                         )
+                       )
+        _BUCKET = _S3_RESOURCE.Bucket(_CFG['s3']['bucket_name'])
+
+    return _BUCKET
   
   except Exception as err:
-    logging.error("get_bucket():")
-    logging.error(str(err))
+    lg.error("get_bucket():")
+    lg.error(str(err))
     raise
   
 
@@ -145,15 +406,14 @@ def get_bucket():
 #
 # get_rekognition
 #
-# create and return rekognition object, based on configuration
-# information in app config file. You should call close() on
-# the object when you are done.
+# return rekognition object, based on configuration information
+# saved by initialize(). The client is built on first use and
+# shared by every caller, so there is nothing to close.
 #
 def get_rekognition():
   """
-  Reads the configuration info from app config file, creates
-  a rekognition object based on this info, and returns it.
-  You should call close() on the object when you are done.
+  Returns the module's shared rekognition client, creating it on
+  the first call. Do not close it.
 
   Parameters
   ----------
@@ -164,32 +424,48 @@ def get_rekognition():
   Rekognition object
   """
 
+  global _REKOG
+
+  if _REKOG is not None:
+    return _REKOG
+
   try:
-    #
-    # configure S3 access using config file:
-    #  
-    configur = ConfigParser()
-    configur.read(PHOTOAPP_CONFIG_FILE)
-    regionname = configur.get('s3', 'region_name')
-
-    rekognition = boto3.client(
-                    'rekognition', 
-                    region_name=regionname,
-                    config = Config(
-                      retries = {
-                        'max_attempts': 3,
-                        'mode': 'standard'
-                      }
-                    )
-                  )
-
-    return rekognition
+    with _AWS_LOCK:
+      if _REKOG is None:
+        _REKOG = boto3.client(
+                   'rekognition', 
+                   region_name=_CFG['s3']['region_name'],
+                   config = Config(
+                     retries = {
+                       'max_attempts': 3,
+                       'mode': 'standard'
+                     }
+                   )
+                 )
+
+    return _REKOG
   
   except Exception as err:
-    logging.error("get_rekognition():")
-    logging.error(str(err))
+    lg.error("get_rekognition():")
+    lg.error(str(err))
     raise
 
+#
+# CloudWatch client for get_ping's object count, built on first use
+# like the Rekognition client:
+#
+def _get_cloudwatch():
+  global _CLOUDWATCH
+
+  if _CLOUDWATCH is not None:
+    return _CLOUDWATCH
+
+  with _AWS_LOCK:
+    if _CLOUDWATCH is None:
+      _CLOUDWATCH = boto3.client('cloudwatch', region_name=_CFG['s3']['region_name'])
+
+  return _CLOUDWATCH
+
 
 ###################################################################
 #
@@ -220,13 +496,20 @@ def initialize(config_file, s3_profile, mysql_user):
   True if successful, raises an exception if not
   """
 
+  global _INIT_KEY
+
+  #
+  # already initialized with these arguments (and the config file
+  # hasn't changed since), nothing to do:
+  #
   try:
-    #
-    # save name of config file for other API functions:
-    #
-    global PHOTOAPP_CONFIG_FILE
-    PHOTOAPP_CONFIG_FILE = config_file
+    key = (config_file, s3_profile, mysql_user, _cfg_stamp(config_file))
+  except OSError:
+    key = None
+  if key is not None and _INIT_KEY == key:
+    return True
 
+  try:
     #
     # configure boto for S3 access, make sure we can read necessary
     # configuration info:
@@ -235,37 +518,102 @@ def initialize(config_file, s3_profile, mysql_user):
 
     boto3.setup_default_session(profile_name=s3_profile)
 
-    configur = ConfigParser()
-    configur.read(config_file)
-    bucketname = configur.get('s3', 'bucket_name')
-    regionname = configur.get('s3', 'region_name')
+    #
+    # parse the config file (cached while it is unchanged on disk):
+    #
+    cfg = _load_cfg(config_file)
+
+    bucketname = cfg['s3']['bucket_name']
+    regionname = cfg['s3']['region_name']
 
     #
     # also check to make sure we can read database server config info:
     #
-    endpoint = configur.get('rds', 'endpoint')
-    portnum = int(configur.get('rds', 'port_number'))
-    username = configur.get('rds', 'user_name')
-    pwd = configur.get('rds', 'user_pwd')
-    dbname = configur.get('rds', 'db_name')
+    endpoint = cfg['rds']['endpoint']
+    portnum = int(cfg['rds']['port_number'])
+    username = cfg['rds']['user_name']
+    pwd = cfg['rds']['user_pwd']
+    dbname = cfg['rds']['db_name']
 
     if username == mysql_user:
       # we have password, all is good:
       pass
     else:
       raise ValueError("mysql_user does not match user_name in [rds] section of config file")
-    
+
+    #
+    # connections in the pool were opened with the old settings:
+    #
+    _drain_pool()
+
+    #
+    # keep the parsed values for the other API functions:
+    #
+    global _CFG
+    _CFG = MappingProxyType({
+      's3': MappingProxyType({
+        'bucket_name': bucketname,
+        'region_name': regionname
+      }),
+      'rds': MappingProxyType({
+        'endpoint': endpoint,
+        'port_number': portnum,
+        'user_name': username,
+        'user_pwd': pwd,
+        'db_name': dbname
+      })
+    })
+
+    #
+    # AWS objects are rebuilt on next use with the new session:
+    #
+    global _S3_RESOURCE, _BUCKET, _REKOG, _CLOUDWATCH
+    with _AWS_LOCK:
+      _S3_RESOURCE = _BUCKET = _REKOG = _CLOUDWATCH = None
+
     #
     # success:
     #
+    _INIT_KEY = key
     return True
 
   except Exception as err:
-    logging.error("initialize():")
-    logging.error(str(err))
+    lg.error("initialize():")
+    lg.error(str(err))
     raise
 
 
+#
+# forget the last initialize() so the next call does the full work
+# again (for tests):
+#
+def _reset_init():
+  global _INIT_KEY
+  _INIT_KEY = None
+
+
+###################################################################
+#
+# _counts
+#
+# returns (# of users, # of assets) from a single query, so callers
+# that want both (e.g. dashboards) pay one round-trip. get_ping only
+# needs the users, and counts just those.
+#
+def _counts():
+  sql = """
+    Select (Select count(userid) From users),
+           (Select count(assetid) From assets);
+  """
+
+  with get_dbConn() as dbConn:
+    with dbConn.cursor() as dbCursor:
+      dbCursor.execute(sql)
+      row = dbCursor.fetchone()
+
+  return (row[0], row[1])
+
+
 ###################################################################
 #
 # get_ping
@@ -300,6 +648,40 @@ def get_ping():
   accessible then N is an error message.
   """
 
+  def count_from_cloudwatch(bucketname):
+    #
+    # latest daily NumberOfObjects datapoint for the bucket, or None
+    # if CloudWatch has nothing (new bucket, no permission, etc.):
+    #
+    try:
+      cw = _get_cloudwatch()
+
+      now = datetime.now(timezone.utc)
+      resp = cw.get_metric_statistics(
+        Namespace='AWS/S3',
+        MetricName='NumberOfObjects',
+        Dimensions=[
+          {'Name': 'BucketName', 'Value': bucketname},
+          {'Name': 'StorageType', 'Value': 'AllStorageTypes'}
+        ],
+        StartTime=now - timedelta(days=3),
+        EndTime=now,
+        Period=86400,
+        Statistics=['Average']
+      )
+
+      points = resp.get('Datapoints', [])
+      if not points:
+        return None
+
+      latest = max(points, key=lambda p: p['Timestamp'])
+      return int(latest['Average'])
+
+    except Exception as err:
+      lg.warning("get_ping.count_from_cloudwatch():")
+      lg.warning(str(err))
+      return None
+
   def get_M():
     try:
       #
@@ -307,85 +689,88 @@ def get_ping():
       #
       bucket = get_bucket()
 
-      assets = bucket.objects.all()
+      if USE_CLOUDWATCH_COUNT:
+        #
+        # the metric says nothing about whether S3 is reachable right
+        # now, so confirm that with a single HEAD on the bucket:
+        #
+        bucket.meta.client.head_bucket(Bucket=bucket.name)
+
+        M = count_from_cloudwatch(bucket.name)
+        if M is not None:
+          return M
+
+      #
+      # sum the per-page key counts from the low-level client rather
+      # than materializing an ObjectSummary for every key:
+      #
+      paginator = bucket.meta.client.get_paginator('list_objects_v2')
 
-      M = len(list(assets))
+      M = 0
+      with _S3_BREAKER:
+        for page in paginator.paginate(Bucket=bucket.name):
+          M += page.get('KeyCount', 0)
       return M
 
     except Exception as err:
-      logging.error("get_ping.get_M():")
-      logging.error(str(err))
+      lg.error("get_ping.get_M():")
+      lg.error(str(err))
       raise
 
-    finally:
-      try:
-        bucket.close()
-      except:
-        pass
-
-  '''
-  @retry(
-    stop=stop_after_attempt( 3 ),
-    wait=wait_exponential(multiplier=1, min=2, max=30),
-    reraise=True
-  )
-  '''
-  @RETRY_3
-  def get_N():
-    try:
-      #
-      # create connection to MySQL database server and then
-      # execute query to retrieve # of users:
-      #
-      dbConn = get_dbConn()
-      dbCursor = dbConn.cursor()
+  def count_users():
+    sql = """
+      Select count(userid) From users;
+    """
 
-      sql = """
-            SELECT count(userid) FROM users;
-            """
-      
-      dbCursor.execute(sql)
-      row = dbCursor.fetchone()
+    try:
+      with get_dbConn() as dbConn:
+        with dbConn.cursor() as dbCursor:
+          dbCursor.execute(sql)
+          row = dbCursor.fetchone()
 
       #
       # we get back a tuple with one result in it:
       #
-      N = row[0]
-      return N
+      return row[0]
 
     except Exception as err:
-      logging.error("get_ping.get_N():")
-      logging.error(str(err))
+      lg.error("get_ping.count_users():")
+      lg.error(str(err))
       raise
-    
-    finally:
-      try: 
-        dbCursor.close()
-      except: 
-        pass
+
+  def get_N():
+    #
+    # up to 3 attempts with jittered exponential backoff, retrying
+    # only connection-level failures:
+    #
+    for attempt in range(3):
       try:
-        dbConn.close()
-      except:
-        pass
+        return count_users()
+      except (_mysql.OperationalError, _mysql.InterfaceError, ConnectionError):
+        if attempt == 2:
+          raise
+        time.sleep(random.uniform(0, min(20, 2 ** (attempt + 1))))
+
+  def _safe(future):
+    try:
+      return future.result()
+    except Exception as err:
+      return str(err)
 
   #
   # we compute M and N separately so that we can do separate exception
-  # handling, and thus get partial results if one succeeds and one fails:
+  # handling, and thus get partial results if one succeeds and one fails.
+  # The two calls are independent network round-trips, so run them
+  # concurrently:
   #
-  try:
-    M = get_M()
-  except Exception as err:
-    M = str(err)
-
-  try:
-    N = get_N()
-  except Exception as err:
-    N = str(err)
+  with ThreadPoolExecutor(max_workers=2) as ex:
+    fM = ex.submit(get_M)
+    fN = ex.submit(get_N)
+    M = _safe(fM)
+    N = _safe(fN)
 
   return (M, N)
 
-import logging as lg
-
 ###################################################################
 #
 # get_users
@@ -429,6 +814,37 @@ def get_users():
 
   return res
 
+###################################################################
+#
+# _images_query
+#
+# query (and its arguments) shared by get_images and iter_images.
+# Both variants are built once at import rather than concatenated
+# on every call.
+#
+_Q_IMAGES_ALL = """
+    Select assetid, userid, localname, bucketkey
+    From assets
+    Order By assetid Asc;
+  """
+
+#
+# served by idx_assets_userid_assetid (see migrations/), so the
+# filtered case needs no filesort:
+#
+_Q_IMAGES_BY_USER = """
+    Select assetid, userid, localname, bucketkey
+    From assets
+    Where userid = %s
+    Order By assetid Asc;
+  """
+
+def _images_query(userid = None):
+  if userid is None:
+    return (_Q_IMAGES_ALL, [])
+
+  return (_Q_IMAGES_BY_USER, [ userid ])
+
 ###################################################################
 #
 # get_images
@@ -456,30 +872,19 @@ def get_images(userid = None):
   an exception is raised.
   """
 
-  query = """
-    Select assetid, userid, localname, bucketkey
-    From assets
-  """
-
-  if userid is not None:
-    query += """
-      Where userid = %s 
-    """
-
-  query += """
-    Order By assetid Asc;
-  """
+  (query, args) = _images_query( userid )
 
   res = None
 
   try:
     with get_dbConn() as dbconn:
-      with dbconn.cursor() as cursor:
-        if userid:
-          cursor.execute( query, [ userid ] )
-        else:
-          cursor.execute( query )
-        res = list( cursor.fetchall() )
+      #
+      # stream rows straight into the result list, instead of the
+      # driver buffering them all and list() copying that buffer:
+      #
+      with dbconn.cursor( SSCursor ) as cursor:
+        cursor.execute( query, args )
+        res = list( cursor )
   except Exception as err:
     lg.error( "get_images():" )
     lg.error( str(err) )
@@ -489,230 +894,342 @@ def get_images(userid = None):
 
 ###################################################################
 #
-# post_image
+# iter_images
 #
-def post_image(userid, local_filename):
+def iter_images(userid = None):
   """
-  Uploads an image to S3 with a unique name, allowing the same local
-  file to be uploaded multiple times if desired. A record of this
-  image is inserted into the database, and upon success a unique
-  assetid is returned to identify this image. The image is also
-  analyzed by the Rekognition AI slop to label objects within
-  the image; the results of this analysis are also saved in the
-  database (and can be retrieved later via get_image_labels). If
-  an error occurs, an exception is raised. An invalid userid is
-  considered a ValueError, "no such userid".
+  Same as get_images, but a generator: rows are streamed from the
+  server with an unbuffered cursor and yielded one at a time, so
+  memory use doesn't grow with the number of images. Finish (or
+  close) the generator promptly, since it holds a database
+  connection while it is live. Not retried; if an error occurs,
+  an exception is raised.
 
   Parameters
   ----------
-  userid for whom we are uploading this image
-  local filename of image to upload
+  userid (optional) filters the returned images for just this userid
 
   Returns
   -------
-  image's assetid upon success, raises an exception on error
+  an iterator of tuples containing assetid, userid, localname, and
+  bucketkey in that order, ordered by assetid, ascending.
   """
 
-  import uuid
+  (query, args) = _images_query( userid )
 
-  # strip parent directories for filename to be recorded in DB
-  pure_local_fname = local_filename[ local_filename.rfind('/')+1: ]
+  try:
+    with get_dbConn() as dbconn:
+      with dbconn.cursor( SSCursor ) as cursor:
+        cursor.execute( query, args )
+        yield from cursor
+  except Exception as err:
+    lg.error( "iter_images():" )
+    lg.error( str(err) )
+    raise
 
-  @RETRY_3
-  def lookup_user():
-    username = None
-    query = """
-       Select username
-       From users
-       Where userid = %s;
-    """
-    try:
-      with get_dbConn() as dbconn:
-        with dbconn.cursor() as cursor:
-          cursor.execute( query, [ userid ] )
-          match cursor.rowcount:
-            case 1:
-              username = cursor.fetchone()[0]
-            case 0:
-              raise ValueError( "post_image(): no such userid" )
-            case _:
-              raise ValueError( "unexpected duplicate userid" )
-    except Exception as err:
-      lg.error( "post_image.lookup_user():" )
-      lg.error( str( err ) )
-      raise
+###################################################################
+#
+# post_image helpers
+#
+# Defined once at import (rather than nested in post_image) so the
+# retry wrappers aren't rebuilt on every upload.
+#
+
+#
+# returns the user's name (the bucket key prefix); an invalid userid
+# is a ValueError, found before anything is uploaded:
+#
+@RETRY_3
+def _lookup_user( userid ):
+  username = None
+  query = """
+    Select username
+    From users
+    Where userid = %s;
+  """
+  try:
+    with get_dbConn() as dbconn:
+      with dbconn.cursor() as cursor:
+        cursor.execute( query, [ userid ] )
+        row = cursor.fetchone()
+        if row is None:
+          raise ValueError( "post_image(): no such userid" )
+        username = row[0]
+  except Exception as err:
+    lg.error( "post_image._lookup_user():" )
+    lg.error( str( err ) )
+    raise
 
-    return username
+  return username
 
-  def upload_to_bucket( username ):
-    bucketkey = None
-    try:
-      bkt = get_bucket() 
-      _bktkey = ''.join(
-        [
-          username, 
-          '/',
-          str( uuid.uuid4() ),
-          '-',
-          pure_local_fname
-        ]
+#
+# uploads the file under a unique key, returns the bucket key:
+#
+def _upload_to_bucket( username, local_filename, pure_local_fname ):
+  bucketkey = None
+  try:
+    bkt = get_bucket() 
+    _bktkey = f"{username}/{uuid.uuid4()}-{pure_local_fname}"
+    print( f"post_image local_filename: {local_filename}" )
+    print( f"post_image _bktkey: {_bktkey}" )
+    with _S3_BREAKER:
+      bkt.meta.client.upload_file(
+        local_filename, bkt.name, _bktkey, Config=TRANSFER_CFG
       )
-      print( f"post_image local_filename: {local_filename}" )
-      print( f"post_image _bktkey: {_bktkey}" )
-      bkt.upload_file( local_filename, _bktkey )
-      bucketkey = _bktkey
-    except Exception as err:
-      lg.error( "post_image.upload_to_bucket():" )
-      lg.error( str( err ) )
-      raise
-    finally:
-      try:
-        bkt.close()
-      except:
-        pass
+    bucketkey = _bktkey
+  except Exception as err:
+    lg.error( "post_image._upload_to_bucket():" )
+    lg.error( str( err ) )
+    raise
 
-    return bucketkey
+  return bucketkey
 
-  @RETRY_3
-  def update_db( bucketkey ):
-    success = False
-    query = """
-      Insert Into assets( userid, localname, bucketkey )
-      Values( %s, %s, %s );
-    """
-    try:
-      with get_dbConn() as dbconn:
-        try:
-          dbconn.begin()
-          with dbconn.cursor() as cursor:
-            cursor.execute( query, [ userid, pure_local_fname, bucketkey ] )
-          dbconn.commit()
-          success = True
-        except Exception as err:
-          dbconn.rollback()
-          lg.error( "post_image.update_db():" )
-          lg.error( str( err ) )
-          raise
-    except Exception as err:
-      lg.error( "post_image.update_db():" )
-      lg.error( str( err ) )
-      raise
-    return success
+#
+# inserts the asset, returns the new (auto-increment) assetid. The
+# insert selects from users, so it only happens if userid still
+# exists at that moment (ValueError otherwise). Not retried: the insert
+# isn't idempotent, and a lost commit reply would otherwise leave
+# a duplicate row.
+#
+def _update_db( userid, pure_local_fname, bucketkey ):
+  assetid = None
+  query = """
+    Insert Into assets( userid, localname, bucketkey )
+    Select userid, %s, %s
+    From users
+    Where userid = %s;
+  """
+  try:
+    #
+    # one statement, so autocommit is enough:
+    #
+    with get_dbConn() as dbconn:
+      with dbconn.cursor() as cursor:
+        cursor.execute( query, [ pure_local_fname, bucketkey, userid ] )
+        if cursor.rowcount == 0:
+          raise ValueError( "post_image(): no such userid" )
+        assetid = cursor.lastrowid
+  except Exception as err:
+    lg.error( "post_image._update_db():" )
+    lg.error( str( err ) )
+    raise
+  return assetid
 
-  @RETRY_3
-  def retrieve_assetid( bucketkey ):
-    assetid = None
-    query = """
-      Select assetid
-      From assets
-      Where bucketkey = %s;   
-    """
-    try:
-      with get_dbConn() as dbconn:
-        with dbconn.cursor() as cursor:
-          cursor.execute( query, [ bucketkey ] )
-          match cursor.rowcount:
-            case 1:
-              assetid = cursor.fetchone()[0]
-            case 0:
-              raise ValueError( "bucket key not found" )
-            case _:
-              raise ValueError( "duplicate bucket key" )
-    except Exception as err:
-      lg.error( "post_image.retrieve_assetid():" )
-      lg.error( str( err ) )
-      raise
+#
+# label cache (see migrations/003_label_cache.sql): labels keyed by
+# the SHA-256 of the image bytes, so re-uploading the same image
+# skips Rekognition. The cache is an optimization only; if it can't
+# be read or written we just call Rekognition. If the table doesn't
+# exist (migration 003 not applied) the cache is switched off for
+# the rest of the process, so uploads stop hashing and querying it.
+#
+_LABEL_CACHE_ON = True
+_ER_NO_SUCH_TABLE = 1146
+
+def _file_sha256( local_filename ):
+  digest = hashlib.sha256()
+  with open( local_filename, 'rb' ) as f:
+    for chunk in iter( functools.partial( f.read, 1024*1024 ), b'' ):
+      digest.update( chunk )
+  return digest.hexdigest()
+
+def _label_cache_failed( where, err ):
+  global _LABEL_CACHE_ON
+  if err.args and err.args[0] == _ER_NO_SUCH_TABLE:
+    _LABEL_CACHE_ON = False
+    lg.info( "label_cache table missing; label cache off" )
+  else:
+    lg.warning( where )
+    lg.warning( str( err ) )
+
+def _cached_labels( digest ):
+  query = """
+    Select labels
+    From label_cache
+    Where sha256 = %s;
+  """
+  try:
+    with get_dbConn() as dbconn:
+      with dbconn.cursor() as cursor:
+        cursor.execute( query, [ digest ] )
+        row = cursor.fetchone()
+    return json.loads( row[0] ) if row else None
+  except Exception as err:
+    _label_cache_failed( "post_image._cached_labels():", err )
+    return None
 
-    return assetid
+def _cache_labels( digest, labels ):
+  query = """
+    Insert Ignore Into label_cache( sha256, labels )
+    Values( %s, %s );
+  """
+  rows = [
+    { 'Name': row.get('Name'), 'Confidence': row.get('Confidence') }
+    for row in labels
+  ]
+  try:
+    with get_dbConn() as dbconn:
+      with dbconn.cursor() as cursor:
+        cursor.execute( query, [ digest, json.dumps( rows ) ] )
+  except Exception as err:
+    _label_cache_failed( "post_image._cache_labels():", err )
 
-  def generate_labels( bucketkey ):
-    labels = None
-    try:
-      bkt = get_bucket()
-      rkg = get_rekognition()
-      response = rkg.detect_labels(
-        Image=\
+#
+# runs Rekognition on the uploaded object (unless the image's
+# labels are already cached), returns its labels:
+#
+@RETRY_3
+def _generate_labels( bucketkey, digest = None ):
+  if digest is not None:
+    labels = _cached_labels( digest )
+    if labels is not None:
+      return labels
+
+  labels = None
+  try:
+    rkg = get_rekognition()
+    response = rkg.detect_labels(
+      Image=\
+      {
+        'S3Object':\
         {
-          'S3Object':\
-          {
-            'Bucket': bkt.name,
-            'Name': bucketkey,
-          },
+          # Rekognition only needs the name, straight from config:
+          'Bucket': _CFG['s3']['bucket_name'],
+          'Name': bucketkey,
         },
-        MaxLabels=100,
-        MinConfidence=80,
-      )
-      labels = response['Labels']
+      },
+      MaxLabels=100,
+      MinConfidence=80,
+    )
+    labels = response['Labels']
 
-    except Exception as err:
-      lg.error( "post_image.get_labels():" )
-      lg.error( str( err ) )
-      raise
+  except Exception as err:
+    lg.error( "post_image._generate_labels():" )
+    lg.error( str( err ) )
+    raise
 
-    finally:
-      try:
-        bkt.close()
-      except:
-        pass
+  if digest is not None:
+    _cache_labels( digest, labels )
+
+  return labels
+
+#
+# stores the asset's labels (from _generate_labels). Not retried,
+# like _update_db: a lost commit reply would otherwise insert the
+# labels twice.
+#
+def _update_labels( assetid, labels ):
+  success = False
+
+  query = """
+    Insert Into labels( assetid, label, confidence )
+    Values( %s, %s, %s );
+  """
+
+  try:
+    with get_dbConn() as dbconn:
       try:
-        rkg.close()
-      except:
-        pass
+        dbconn.begin()
+        #
+        # executemany rewrites the single-row INSERT into one
+        # multi-row INSERT, so all labels go over in one round-trip:
+        #
+        rows = [
+          ( assetid, row.get('Name'), int( row.get('Confidence') ) )
+          for row in labels
+        ]
+        with dbconn.cursor() as cursor:
+          cursor.executemany( query, rows )
+        dbconn.commit()
+        success = True
 
-    return labels
+      except Exception as err:
+        dbconn.rollback()
+        lg.error( "post_image._update_labels():" )
+        lg.error( str( err ) )
+        raise
 
-  @RETRY_3
-  def update_labels( assetid, bucketkey ):
-    success = False
+  except Exception as err:
+    lg.error( "post_image._update_labels():" )
+    lg.error( str( err ) )
+    raise
 
-    query = """
-      Insert Into labels( assetid, label, confidence )
-      Values( %s, %s, %s );
-    """
+  return success
 
-    try:
-      labels = generate_labels( bucketkey )
-      with get_dbConn() as dbconn:
-        try:
-          dbconn.begin()
-          with dbconn.cursor() as cursor:
-            for row in labels:
-              cursor.execute(
-                query, 
-                [ assetid, row.get('Name'), int( row.get('Confidence') ) ]
-              )
-          dbconn.commit()
-          success = True
+#
+# best-effort removal of an uploaded object that didn't make it
+# into the database:
+#
+def _discard_object( bucketkey ):
+  try:
+    bkt = get_bucket()
+    bkt.meta.client.delete_object( Bucket=bkt.name, Key=bucketkey )
+  except Exception as err:
+    lg.warning( "post_image._discard_object():" )
+    lg.warning( str( err ) )
 
-        except Exception as err:
-          dbconn.rollback()
-          lg.error( "post_image.update_labels():" )
-          lg.error( str( err ) )
-          raise
+###################################################################
+#
+# post_image
+#
+def post_image(userid, local_filename):
+  """
+  Uploads an image to S3 with a unique name, allowing the same local
+  file to be uploaded multiple times if desired. A record of this
+  image is inserted into the database, and upon success a unique
+  assetid is returned to identify this image. The image is also
+  analyzed by the Rekognition AI slop to label objects within
+  the image; the results of this analysis are also saved in the
+  database (and can be retrieved later via get_image_labels). If
+  an error occurs, an exception is raised. An invalid userid is
+  considered a ValueError, "no such userid".
 
-    except Exception as err:
-      lg.error( "post_image.update_labels():" )
-      lg.error( str( err ) )
-      raise
+  Parameters
+  ----------
+  userid for whom we are uploading this image
+  local filename of image to upload
 
-    return success
+  Returns
+  -------
+  image's assetid upon success, raises an exception on error
+  """
 
-  username = lookup_user()
-  if not username:
-    return None
+  # strip parent directories for filename to be recorded in DB
+  pure_local_fname = os.path.basename( local_filename )
 
-  bucketkey = upload_to_bucket( username )
+  # one cheap SELECT rejects an invalid userid before any S3 or
+  # Rekognition work is done
+  username = _lookup_user( userid )
+
+  # content hash, to reuse labels for an image we've seen before
+  digest = _file_sha256( local_filename ) if _LABEL_CACHE_ON else None
+
+  bucketkey = _upload_to_bucket( username, local_filename, pure_local_fname )
   if not bucketkey:
     return None
 
-  if not update_db( bucketkey ):
-    return None
+  #
+  # the asset row (MySQL) and the labels (Rekognition) only need
+  # the uploaded object, not each other, so overlap the two:
+  #
+  # if the user was deleted since the lookup, _update_db fails and
+  # the object we just uploaded is removed again.
+  #
+  with ThreadPoolExecutor(max_workers=2) as ex:
+    f_assetid = ex.submit( _update_db, userid, pure_local_fname, bucketkey )
+    f_labels = ex.submit( _generate_labels, bucketkey, digest )
+    try:
+      assetid = f_assetid.result()
+    except ValueError:
+      f_labels.cancel()
+      _discard_object( bucketkey )
+      raise
+    labels = f_labels.result()
 
-  assetid = retrieve_assetid( bucketkey )
   if not assetid:
     return None
 
-  if not update_labels( assetid, bucketkey ):
+  if not _update_labels( assetid, labels ):
     return None
 
   return assetid
@@ -775,17 +1292,15 @@ def get_image( assetid, local_filename=None ):
     success = False
     try:
       bkt = get_bucket()
-      bkt.download_file( bucketkey, localname )
+      with _S3_BREAKER:
+        bkt.meta.client.download_file(
+          bkt.name, bucketkey, localname, Config=TRANSFER_CFG
+        )
       success = True
     except Exception as err:
       lg.error( "get_image.get_file():" )
       lg.error( str( err ) )
       raise
-    finally:
-      try:
-        bucket.close()
-      except:
-        pass
 
     return success
 
@@ -811,12 +1326,12 @@ def delete_images():
 
   Returns True if successful, raises an exception on error.
 
-  The images are not deleted from S3 unless the database is successfully 
-  cleared; if an error occurs either 
-  (a) there are no changes or 
-  (b) the database is cleared but there may be one or more images 
-  remaining in S3 (which has no negative effect since they have unique 
-  names).
+  The images are deleted from S3 first, and the database is only
+  cleared once S3 is; if an error occurs either
+  (a) there are no changes or
+  (b) some images are gone from S3 but the database still lists them
+  all, so calling delete_images() again finishes the job (deleting an
+  already-deleted S3 key is not an error).
 
   Parameters
   ----------
@@ -827,6 +1342,12 @@ def delete_images():
   True if successful, raises an exception on error
   """
 
+  #
+  # S3's DeleteObjects takes at most 1000 keys per request, so the
+  # keys are read (and later deleted) in batches of that size:
+  #
+  BATCH = 1000
+
   @RETRY_3
   def getbucketkeys():
     query = """
@@ -837,10 +1358,18 @@ def delete_images():
  
     try:
       with get_dbConn() as dbconn:
-        with dbconn.cursor() as cursor:
+        #
+        # unbuffered, so only one batch of raw rows is client-side
+        # at a time (a buffered cursor's fetchmany still holds all):
+        #
+        with dbconn.cursor( SSCursor ) as cursor:
           cursor.execute( query )
-          rows = cursor.fetchall()
-          keys = [ { 'Key': row[0] } for row in rows ]
+          keys = []
+          while True:
+            rows = cursor.fetchmany( BATCH )
+            if not rows:
+              break
+            keys.append( [ { 'Key': row[0] } for row in rows ] )
     except Exception as err:
       lg.error( "delete_images.getbucketkeys():" )
       lg.error( str( err ) )
@@ -853,15 +1382,18 @@ def delete_images():
 
   @RETRY_3
   def clear_db():
-    query = """
-      SET foreign_key_checks = 0;
-
-      TRUNCATE TABLE assets;
-      TRUNCATE TABLE labels;
-
-      SET foreign_key_checks = 1;
-      ALTER TABLE assets AUTO_INCREMENT = 1001;
-    """
+    #
+    # sent one at a time (connections don't enable multi-statement
+    # queries); all on the same connection, so the session-level
+    # foreign_key_checks setting covers both truncates:
+    #
+    queries = [
+      "SET foreign_key_checks = 0;",
+      "TRUNCATE TABLE assets;",
+      "TRUNCATE TABLE labels;",
+      "SET foreign_key_checks = 1;",
+      "ALTER TABLE assets AUTO_INCREMENT = 1001;"
+    ]
     success = False
 
     try:
@@ -869,11 +1401,21 @@ def delete_images():
         try:
           dbconn.begin()
           with dbconn.cursor() as cursor:
-            cursor.execute( query )
+            for query in queries:
+              cursor.execute( query )
           dbconn.commit()
           success = True
         except Exception as err:
           dbconn.rollback()
+          #
+          # the connection goes back to the pool, don't leave it
+          # with foreign key checks off:
+          #
+          try:
+            with dbconn.cursor() as cursor:
+              cursor.execute( "SET foreign_key_checks = 1;" )
+          except Exception:
+            pass
           lg.error( "delete_images.clear_db():" )
           lg.error( str( err ) )
           raise
@@ -884,21 +1426,37 @@ def delete_images():
       raise
     return success
 
-  def clear_bucket( bucketkeys ):
+  def clear_bucket( batches ):
     success = False
+
+    def delete_batch( batch ):
+      with _S3_BREAKER:
+        resp = bkt.meta.client.delete_objects(
+          Bucket=bkt.name, Delete={ 'Objects': batch, 'Quiet': True }
+        )
+      #
+      # quiet mode only reports the keys that failed:
+      #
+      errors = resp.get( 'Errors', [] )
+      if errors:
+        raise RuntimeError(
+          f"delete_images(): {len(errors)} S3 deletes failed, "
+          f"e.g. {errors[0].get('Key')}: {errors[0].get('Message')}"
+        )
+
     try:
       bkt = get_bucket()
-      bkt.delete_objects( Delete={ 'Objects': bucketkeys } )
+      #
+      # batches are independent requests, so send a few at a time:
+      #
+      with ThreadPoolExecutor(max_workers=4) as ex:
+        for _ in ex.map( delete_batch, batches ):
+          pass
       success = True
     except Exception as err:
       lg.error( "delete_images.clear_bucket():" )
       lg.error( str( err ) )
       raise
-    finally:
-      try:
-        bucket.close()
-      except:
-        pass
 
     return success
 
@@ -906,10 +1464,10 @@ def delete_images():
   if not bucketkeys:
     return False
 
-  if not clear_db():
+  if not clear_bucket( bucketkeys ):
     return False
 
-  if not clear_bucket( bucketkeys ):
+  if not clear_db():
     return False
 
   return True
@@ -946,29 +1504,28 @@ def get_image_labels( assetid ):
 
   labels = []
 
-  aid_query = """
-    Select assetid 
-    From assets
-    Where assetid = %s;
-  """
-
-  labels_query = """
-    Select label, confidence
-    From labels
-    Where assetid = %s
-    Order By label Asc;
+  #
+  # one round-trip: the asset row is always there if the assetid is
+  # valid, with NULL label columns if it has no labels:
+  #
+  query = """
+    Select l.label, l.confidence
+    From assets a
+    Left Join labels l On l.assetid = a.assetid
+    Where a.assetid = %s
+    Order By l.label Asc;
   """
 
   try:
     with get_dbConn() as dbconn:
       with dbconn.cursor() as cursor:
+        cursor.execute( query, [ assetid ] )
+        rows = cursor.fetchall()
 
-        cursor.execute( aid_query, [ assetid ] )
-        if cursor.rowcount < 1:
-          raise ValueError( "get_image_labels(): no such assetid" )
+    if not rows:
+      raise ValueError( "get_image_labels(): no such assetid" )
 
-        cursor.execute( labels_query, [ assetid ] )
-        labels = list( cursor.fetchall() )
+    labels = [ row for row in rows if row[0] is not None ]
 
   except Exception as err:
     lg.error( "get_image_labels():" )
@@ -1014,6 +1571,11 @@ def get_images_with_label( label ):
 
   pattern = f"%{label}%"
 
+  #
+  # a leading-wildcard LIKE can't seek an index; it's answered by
+  # scanning idx_labels_label_cover (see migrations/) instead of
+  # the table:
+  #
   query = """
     Select assetid, label, confidence
     From labels
@@ -1023,9 +1585,10 @@ def get_images_with_label( label ):
 
   try:
     with get_dbConn() as dbconn:
-      with dbconn.cursor() as cursor:
+      # (streamed, as in get_images)
+      with dbconn.cursor( SSCursor ) as cursor:
         cursor.execute( query, [ pattern ] )
-        res = list( cursor.fetchall() )
+        res = list( cursor )
   except Exception as err:
     lg.error( "get_images_with_label():" )
     lg.error( str( err ) )
@@ -1,16 +1,146 @@
 import sys
 import os
+import functools
 from PyQt6.QtWidgets import (
 	QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-	QPushButton, QTableWidget, QTableWidgetItem, QLineEdit, 
-	QLabel, QFileDialog, QMessageBox, QTabWidget, QHeaderView, QInputDialog
+	QPushButton, QTableView, QLineEdit, 
+	QLabel, QFileDialog, QMessageBox, QTabWidget, QHeaderView, QInputDialog,
+	QStyledItemDelegate, QStyleOptionButton, QStyle
+)
+from PyQt6.QtGui import QPixmap, QPixmapCache
+from PyQt6.QtCore import (
+	Qt, QEvent, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal,
+	QAbstractTableModel, QModelIndex
 )
-from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import Qt
 
 #import part02.photoapp as photoapp 
 from part02 import photoapp
 
+class WorkerSignals(QObject):
+	"""Signals a Worker uses to hand its result back to the GUI thread."""
+	done = pyqtSignal(object)
+	failed = pyqtSignal(str)
+
+class Worker(QRunnable):
+	"""Runs one blocking photoapp call on the Qt thread pool."""
+	def __init__(self, fn, *args, **kwargs):
+		super().__init__()
+		self.fn = fn
+		self.args = args
+		self.kwargs = kwargs
+		self.signals = WorkerSignals()
+
+	def run(self):
+		try:
+			result = self.fn(*self.args, **self.kwargs)
+		except Exception as e:
+			self.signals.failed.emit(str(e))
+		else:
+			self.signals.done.emit(result)
+
+class RowsModel(QAbstractTableModel):
+	"""Table model over the row tuples photoapp returns, so the views
+	read cells straight from the result list instead of one item object
+	per cell. Columns past the end of a tuple (the button columns) are
+	left empty; UserRole on any cell gives the row's first field, the
+	asset id for the image and label tables.
+
+	Rows are exposed to the view FETCH_BATCH at a time, as it scrolls
+	towards the end (canFetchMore / fetchMore); each batch's display
+	strings are formatted once, as it is loaded."""
+	FETCH_BATCH = 100
+
+	def __init__(self, headers, formats=None, parent=None):
+		super().__init__(parent)
+		self._headers = headers
+		self._formats = formats or {}
+		self._rows = []
+		self._display = []
+		self._rows_loaded = 0
+
+	def _format(self, rows):
+		fmts = [ self._formats.get(col, str) for col in range(len(self._headers)) ]
+		return [
+			tuple( fmt(val) for fmt, val in zip(fmts, row) )
+			for row in rows
+		]
+
+	def set_rows(self, rows):
+		self.beginResetModel()
+		self._rows = rows
+		self._rows_loaded = min(self.FETCH_BATCH, len(rows))
+		self._display = self._format(rows[:self._rows_loaded])
+		self.endResetModel()
+
+	def rowCount(self, parent=QModelIndex()):
+		return 0 if parent.isValid() else self._rows_loaded
+
+	def canFetchMore(self, parent=QModelIndex()):
+		return not parent.isValid() and self._rows_loaded < len(self._rows)
+
+	def fetchMore(self, parent=QModelIndex()):
+		if parent.isValid():
+			return
+		more = min(self.FETCH_BATCH, len(self._rows) - self._rows_loaded)
+		if more <= 0:
+			return
+		self.beginInsertRows(QModelIndex(), self._rows_loaded, self._rows_loaded + more - 1)
+		self._display += self._format(
+			self._rows[self._rows_loaded:self._rows_loaded + more]
+		)
+		self._rows_loaded += more
+		self.endInsertRows()
+
+	def columnCount(self, parent=QModelIndex()):
+		return 0 if parent.isValid() else len(self._headers)
+
+	def display(self, row_idx, col):
+		texts = self._display[row_idx]
+		return texts[col] if col < len(texts) else None
+
+	def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+		# the default delegate asks for many roles per paint; answer
+		# the one it paints from first, and the rest with a cheap None
+		if role == Qt.ItemDataRole.DisplayRole:
+			return self.display(index.row(), index.column())
+		if role == Qt.ItemDataRole.UserRole:
+			return self._rows[index.row()][0]
+		return None
+
+	def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+		if role == Qt.ItemDataRole.DisplayRole \
+				and orientation == Qt.Orientation.Horizontal:
+			return self._headers[section]
+		return None
+
+class ButtonDelegate(QStyledItemDelegate):
+	"""Paints a push button in every cell of a column, without creating
+	a widget per row. A click emits the asset id the model reports (as
+	UserRole data) for the clicked row."""
+	clicked = pyqtSignal(int)
+
+	def __init__(self, text, parent=None):
+		super().__init__(parent)
+		self.text = text
+
+	def paint(self, painter, option, index):
+		btn = QStyleOptionButton()
+		btn.rect = option.rect.adjusted(2, 2, -2, -2)
+		btn.text = self.text
+		btn.state = QStyle.StateFlag.State_Enabled | QStyle.StateFlag.State_Raised
+		QApplication.style().drawControl(
+			QStyle.ControlElement.CE_PushButton, btn, painter
+		)
+
+	def editorEvent(self, event, model, option, index):
+		if event.type() == QEvent.Type.MouseButtonRelease \
+				and option.rect.contains(event.position().toPoint()):
+			assetid = model.index(index.row(), 0).data(Qt.ItemDataRole.UserRole)
+			if assetid is not None:
+				self.clicked.emit(int(assetid))
+			return True
+		return False
+
 class ImagePopup(QWidget):
 	"""Simple popup window to display the downloaded image."""
 	def __init__(self, image_path):
@@ -18,20 +148,56 @@ class ImagePopup(QWidget):
 
 		self.setWindowTitle(f"Image Preview: { image_path }")
 		label = QLabel()
-		pixmap = QPixmap(image_path)
-		# Scale image to fit reasonable window size while keeping aspect ratio
-		label.setPixmap(pixmap.scaled(800, 600, Qt.AspectRatioMode.KeepAspectRatio))
+		label.setPixmap(self.scaled_pixmap(image_path, 800, 600))
 
 		layout = QVBoxLayout()
 		layout.addWidget(label)
 		self.setLayout(layout)
 
+	@staticmethod
+	def scaled_pixmap(image_path, w, h):
+		# decoding + scaling a large image is slow, so keep the result in
+		# QPixmapCache; the file's mtime / size in the key means a fresh
+		# download over the same path is picked up
+		st = os.stat(image_path)
+		key = f"{image_path}:{st.st_mtime_ns}:{st.st_size}:{w}x{h}"
+		pixmap = QPixmapCache.find(key)
+		if pixmap is None:
+			# Scale image to fit reasonable window size while keeping aspect ratio
+			pixmap = QPixmap(image_path).scaled(
+				w, h,
+				Qt.AspectRatioMode.KeepAspectRatio,
+				Qt.TransformationMode.SmoothTransformation
+			)
+			QPixmapCache.insert(key, pixmap)
+		return pixmap
+
 class PhotoAppGUI(QMainWindow):
 	def __init__(self):
 		super().__init__()
 		self.setWindowTitle("S3 PhotoApp")
 		self.resize(1000, 600)
 
+		# photoapp calls block on S3 / RDS, so they run here, not on
+		# the GUI thread; results come back through signals
+		self.pool = QThreadPool.globalInstance()
+		# the work is network-bound, so don't cap it at the core count
+		self.pool.setMaxThreadCount(8)
+		self._workers = set()
+		# bumped per request that refills a table, so a slower, older
+		# reply can't overwrite a newer one (see run_async's view=)
+		self._generation = {"images": 0, "labels": 0}
+
+		# labels don't change until an upload or delete, so repeat
+		# lookups are answered locally; per window, cleared by
+		# invalidate_caches()
+		self._cached_labels = functools.lru_cache(maxsize=256)(
+			photoapp.get_image_labels
+		)
+		self._cached_label_search = functools.lru_cache(maxsize=256)(
+			photoapp.get_images_with_label
+		)
+
 		# Main Layout
 		self.tabs = QTabWidget()
 		self.setCentralWidget(self.tabs)
@@ -64,6 +230,17 @@ class PhotoAppGUI(QMainWindow):
 		
 		search_btn = QPushButton("List all / user images")
 		search_btn.clicked.connect( self.refresh_image_list )
+
+		# refresh once typing settles, not per keystroke
+		self._search_debounce = QTimer( self, singleShot=True, interval=250 )
+		self._search_debounce.timeout.connect(
+			# wait out anything that isn't (yet) a user ID
+			lambda: self._userid_text_ok() and self.refresh_image_list()
+		)
+		self.user_id_input.textChanged.connect(
+			lambda _: self._search_debounce.start()
+		)
+		self.user_id_input.returnPressed.connect( self.refresh_image_list )
  
 		search_layout.addWidget( QLabel("User:") )
 		search_layout.addWidget( self.user_id_input )
@@ -72,10 +249,27 @@ class PhotoAppGUI(QMainWindow):
 		# Image Table
 		column_names = [ "asset id", "userid", "filename", "bucketkey", "labels", "download" ]
 
-		self.img_tbl = QTableWidget( 0, len( column_names ) ) 
-		self.img_tbl.setHorizontalHeaderLabels( column_names )
+		self.img_model = RowsModel( column_names )
+		self.img_tbl = QTableView()
+		self.img_tbl.setModel( self.img_model )
 		self.img_tbl.horizontalHeader()\
 			.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+		self.img_tbl.setEditTriggers( QTableView.EditTrigger.NoEditTriggers )
+		self.img_tbl.setSelectionBehavior( QTableView.SelectionBehavior.SelectRows )
+		self.img_tbl.setSelectionMode( QTableView.SelectionMode.ExtendedSelection )
+
+		# action columns are painted by one delegate each, not a
+		# QPushButton per row
+		self.img_labels_delegate = ButtonDelegate( "View all labels", self.img_tbl )
+		self.img_labels_delegate.clicked.connect( self.show_labels_popup )
+		self.img_tbl.setItemDelegateForColumn( 4, self.img_labels_delegate )
+
+		self.img_dl_delegate = ButtonDelegate( "Download", self.img_tbl )
+		self.img_dl_delegate.clicked.connect( self.download_and_display )
+		self.img_tbl.setItemDelegateForColumn( 5, self.img_dl_delegate )
+
+		dl_sel_btn = QPushButton( "Download selected" )
+		dl_sel_btn.clicked.connect( self.download_selected_handler )
 
 		del_btn = QPushButton( "Delete all images" )
 		del_btn.clicked.connect( self.delete_handler )
@@ -83,6 +277,7 @@ class PhotoAppGUI(QMainWindow):
 		layout = QVBoxLayout()
 		layout.addLayout( search_layout )
 		layout.addWidget( self.img_tbl )
+		layout.addWidget( dl_sel_btn )
 		layout.addWidget( del_btn )
 
 		self.search_images_tab.setLayout(layout)
@@ -91,27 +286,25 @@ class PhotoAppGUI(QMainWindow):
 
 		column_names = [ "userid", "username", "given name", "family name" ]
 
-		self.usr_tbl = QTableWidget( 0, len( column_names ) )
-		self.usr_tbl.setHorizontalHeaderLabels( column_names )
+		self.usr_model = RowsModel( column_names )
+		self.usr_tbl = QTableView()
+		self.usr_tbl.setModel( self.usr_model )
 		self.usr_tbl.horizontalHeader()\
 			.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
 
+		def populate( usrlist ):
+			self.usr_model.set_rows( usrlist )
+
 		def get_users_handler():
-			try:
-				usrlist = photoapp.get_users()
-				self.usr_tbl.setRowCount(0)
-				for row_idx, ( uid, uname, gn, fn ) in enumerate( usrlist ):
-					self.usr_tbl.insertRow( row_idx )
-					self.usr_tbl.setItem( row_idx, 0, QTableWidgetItem( str( uid ) ) )
-					self.usr_tbl.setItem( row_idx, 1, QTableWidgetItem( uname ) )
-					self.usr_tbl.setItem( row_idx, 2, QTableWidgetItem( gn ) )
-					self.usr_tbl.setItem( row_idx, 3, QTableWidgetItem( fn ) )
-			except Exception as e:
-				QMessageBox.critical(
+			self.run_async(
+				photoapp.get_users,
+				on_done=populate,
+				on_error=lambda msg: QMessageBox.critical(
 					self,
 					"Error",
-					f"Failed to get user list: {str(e)}"
+					f"Failed to get user list: {msg}"
 				)
+			)
 
 		get_users_btn = QPushButton("View All Users")
 		get_users_btn.clicked.connect( get_users_handler )
@@ -146,10 +339,23 @@ class PhotoAppGUI(QMainWindow):
 
 		column_names = [ "assetid", "label", "confidence", "all labels", "download" ]
 
-		self.label_tbl = QTableWidget( 0, len( column_names ) )
-		self.label_tbl.setHorizontalHeaderLabels( column_names )
+		self.label_model = RowsModel(
+			column_names,
+			formats={ 2: lambda conf: f"{conf:.1f}%" }
+		)
+		self.label_tbl = QTableView()
+		self.label_tbl.setModel( self.label_model )
 		self.label_tbl.horizontalHeader()\
 			.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+		self.label_tbl.setEditTriggers( QTableView.EditTrigger.NoEditTriggers )
+
+		self.label_labels_delegate = ButtonDelegate( "View all labels", self.label_tbl )
+		self.label_labels_delegate.clicked.connect( self.show_labels_popup )
+		self.label_tbl.setItemDelegateForColumn( 3, self.label_labels_delegate )
+
+		self.label_dl_delegate = ButtonDelegate( "Download", self.label_tbl )
+		self.label_dl_delegate.clicked.connect( self.download_and_display )
+		self.label_tbl.setItemDelegateForColumn( 4, self.label_dl_delegate )
 
 		self.label_srch_input = QLineEdit()
 		self.label_srch_input.setPlaceholderText("animal") 
@@ -157,6 +363,17 @@ class PhotoAppGUI(QMainWindow):
 		label_srch_btn = QPushButton("Search")
 		label_srch_btn.clicked.connect( self.search_by_label_handler )
 
+		self._label_debounce = QTimer( self, singleShot=True, interval=250 )
+		self._label_debounce.timeout.connect(
+			# a cleared box just waits; only an explicit search warns
+			lambda: self.label_srch_input.text().strip() \
+				and self.search_by_label_handler()
+		)
+		self.label_srch_input.textChanged.connect(
+			lambda _: self._label_debounce.start()
+		)
+		self.label_srch_input.returnPressed.connect( self.search_by_label_handler )
+
 		input_layout = QHBoxLayout()
 		input_layout.addWidget( QLabel("Label pattern: ") )
 		input_layout.addWidget( self.label_srch_input )
@@ -168,37 +385,66 @@ class PhotoAppGUI(QMainWindow):
 
 		self.label_search_tab.setLayout( layout )
 
+	# --- Background calls ---
+
+	def run_async(self, fn, *args, on_done=None, on_error=None, view=None, **kwargs):
+		""" Runs fn(*args, **kwargs) on the thread pool; on_done(result)
+		or on_error(message) is then called on the GUI thread. With a
+		view ("images" or "labels"), only the latest request for that
+		view reports back; earlier ones still in flight are dropped """
+		worker = Worker(fn, *args, **kwargs)
+		# keep the worker (and its signals) alive until it reports back
+		self._workers.add(worker)
+		gen = self._supersede(view) if view else None
+
+		def finish(handler, value):
+			self._workers.discard(worker)
+			if view and gen != self._generation[view]:
+				return
+			if handler:
+				handler(value)
+
+		worker.signals.done.connect(lambda res: finish(on_done, res))
+		worker.signals.failed.connect(lambda msg: finish(on_error, msg))
+		self.pool.start(worker)
+
+	def _supersede(self, view):
+		""" Marks any request in flight for view as stale """
+		self._generation[view] += 1
+		return self._generation[view]
+
+	def invalidate_caches(self):
+		self._cached_labels.cache_clear()
+		self._cached_label_search.cache_clear()
+
 	# --- Logic Handlers ---
 
 	def refresh_image_list(self):
 		""" Refreshes image list upon search/upload/delete """
-		try:
-			uid = self.user_id_input.text().strip() or None
-			images = photoapp.get_images(userid=uid)
-			
-			self.img_tbl.setRowCount(0)
-			for row_idx, (assetid, userid, localname, bucketkey) in enumerate(images):
-				self.img_tbl.insertRow(row_idx)
-				self.img_tbl.setItem(row_idx, 0, QTableWidgetItem(str(assetid)))
-				self.img_tbl.setItem(row_idx, 1, QTableWidgetItem(str(userid)))
-				self.img_tbl.setItem(row_idx, 2, QTableWidgetItem(localname))
-				self.img_tbl.setItem(row_idx, 3, QTableWidgetItem(bucketkey))
-
-				# Button to see labels for this specific image
-				labels_btn = QPushButton("View all labels")
-				labels_btn.clicked.connect(
-					lambda _ch, aid=assetid: self.show_labels_popup(aid)
-				)
-				self.img_tbl.setCellWidget(row_idx, 4, labels_btn)
+		self._search_debounce.stop()
+		if not self._userid_text_ok():
+			QMessageBox.warning(self, "Input error", "User ID must be a number.")
+			return
 
-				# Download Button for each row
-				dl_btn = QPushButton("Download")
-				dl_btn.clicked.connect(
-					lambda _ch, aid=assetid: self.download_and_display(aid)
-				)
-				self.img_tbl.setCellWidget(row_idx, 5, dl_btn)
-		except Exception as e:
-			QMessageBox.critical(self, "Error", f"Failed to fetch images: {str(e)}")
+		uid = self.user_id_input.text().strip() or None
+		self.run_async(
+			photoapp.get_images,
+			userid=uid,
+			view="images",
+			on_done=self._populate_img_tbl,
+			on_error=lambda msg: QMessageBox.critical(
+				self, "Error", f"Failed to fetch images: {msg}"
+			)
+		)
+
+	def _userid_text_ok(self):
+		uid = self.user_id_input.text().strip()
+		return not uid or uid.isdigit()
+
+	def _populate_img_tbl(self, images):
+		# one model reset for the whole result, rather than building
+		# an item per cell
+		self.img_model.set_rows(images)
 
 	def upload_handler(self):
 		uid = self.upload_user_id.text().strip()
@@ -213,60 +459,59 @@ class PhotoAppGUI(QMainWindow):
 			"Images (*.png *.jpg *.jpeg)"
 		 )
 		if file_path:
-			try:
-				asset_id = photoapp.post_image(uid, file_path)
+			def uploaded(asset_id):
+				self.invalidate_caches()
 				QMessageBox.information(self, 
 					"Success",
 					f"Uploaded! Asset ID: {asset_id}"
 				)
 				self.refresh_image_list()
-			except Exception as e:
-				QMessageBox.critical(self, "Upload failed", str(e))
+
+			self.run_async(
+				photoapp.post_image, uid, file_path,
+				on_done=uploaded,
+				on_error=lambda msg: QMessageBox.critical(self, "Upload failed", msg)
+			)
 
 	def search_by_label_handler(self):
 		"""Logic for get_images_with_label(label)"""
+		self._label_debounce.stop()
 		label_text = self.label_srch_input.text().strip()
 		if not label_text:
 			QMessageBox.warning(self, "Input error", "Please enter a label to search.")
 			return
 
-		try:
-			results = photoapp.get_images_with_label( label_text )
-			self.label_tbl.setRowCount(0)
-			for row_idx, (assetid, label, confidence) in enumerate(results):
-				self.label_tbl.insertRow(row_idx)
-				self.label_tbl.setItem(row_idx, 0, QTableWidgetItem( str(assetid)) )
-				self.label_tbl.setItem(row_idx, 1, QTableWidgetItem(f"{label}"))
-				self.label_tbl.setItem(row_idx, 2, QTableWidgetItem(f"{confidence:.1f}%"))
-
-				# Button to see ALL labels for this specific image
-				all_labels_btn = QPushButton("View all labels")
-				all_labels_btn.clicked.connect(
-					lambda _ch, aid=assetid: self.show_labels_popup( aid )
-				)
-				self.label_tbl.setCellWidget(row_idx, 3, all_labels_btn)
+		self.run_async(
+			self._cached_label_search, label_text,
+			view="labels",
+			on_done=self._populate_label_tbl,
+			on_error=lambda msg: QMessageBox.critical(self, "Search error", msg)
+		)
 
-				# Button to download
-				dl_btn = QPushButton("Download")
-				dl_btn.clicked.connect(
-					lambda _ch, aid=assetid: self.download_and_display( aid )
-				)
-				self.label_tbl.setCellWidget(row_idx, 4, dl_btn)
-		except Exception as e:
-			QMessageBox.critical(self, "Search error", str(e))
+	def _populate_label_tbl(self, results):
+		self.label_model.set_rows(results)
 
 	def delete_handler( self ):
-		try:
-			success = photoapp.delete_images()
+		def deleted( success ):
+			self.invalidate_caches()
 			if success:
+				# nothing left to list, so empty the tables locally
+				# rather than re-querying (and drop listings in flight)
+				self._supersede("images")
+				self._supersede("labels")
+				self.img_model.set_rows([])
+				self.label_model.set_rows([])
 				QMessageBox.information(
 					self,
 					"Success",
 					"All images deleted"
 				)
-				self.refresh_image_list()
-		except Exception as e:
-			QMessageBox.critical( self, "Delete failed", str(e) )
+
+		self.run_async(
+			photoapp.delete_images,
+			on_done=deleted,
+			on_error=lambda msg: QMessageBox.critical( self, "Delete failed", msg )
+		)
 
 	def download_and_display(self, assetid):
 		local_name, ok = QInputDialog.getText(
@@ -278,12 +523,7 @@ class PhotoAppGUI(QMainWindow):
 		if ok:
 			local_name = local_name.strip() or None
 
-			try:
-				# Download file
-				filename = photoapp.get_image(
-					assetid, local_filename=local_name
-				) 
-			
+			def downloaded( filename ):
 				# Show in a popup window
 				QMessageBox.information(
 					self,
@@ -292,40 +532,83 @@ class PhotoAppGUI(QMainWindow):
 				)
 				self.viewer = ImagePopup( filename )
 				self.viewer.show()
-			except Exception as e:
-				QMessageBox.critical(
+
+			# Download file
+			self.run_async(
+				photoapp.get_image, assetid, local_filename=local_name,
+				on_done=downloaded,
+				on_error=lambda msg: QMessageBox.critical(
 					self,
 					"Error",
-					f"Could not download image: {str(e)}"
+					f"Could not download image: {msg}"
+				)
 			)
 
-	def show_labels_popup(self, assetid):
-		"""Logic for get_image_labels(assetid)"""
-		try:
-			labels_data = photoapp.get_image_labels(assetid)
-			if not labels_data:
-				QMessageBox.information(
-					self, 
-					"Labels", 
-					"No labels found for this image."
-				)
+	def download_selected_handler(self):
+		assetids = [
+			idx.data(Qt.ItemDataRole.UserRole)
+			for idx in self.img_tbl.selectionModel().selectedRows()
+		]
+		if not assetids:
+			QMessageBox.warning(self, "Input error", "Please select images to download.")
+			return
+		self.download_many(assetids)
+
+	def download_many(self, assetids):
+		""" Downloads the given assets (under their remote filenames)
+		concurrently on the thread pool, then reports once all are done """
+		pending = set(assetids)
+		saved, failed = [], []
+
+		def finish(assetid, bucket, value):
+			pending.discard(assetid)
+			bucket.append(value)
+			if pending:
 				return
-
-			# Format the list of (label, confidence) tuples into a string
-			label_str = "\n".join(
-				[ f"{label}: {conf:.2f}%" for label, conf in labels_data ]
-			)
-			QMessageBox.information(
-				self,
-				f"Labels for asset {assetid}",
-				label_str
+			msg = f"Downloaded {len(saved)} of {len(assetids)} images"
+			if failed:
+				msg += ":\n" + "\n".join(failed)
+				QMessageBox.warning(self, "Download", msg)
+			else:
+				QMessageBox.information(self, "Download", msg)
+
+		for aid in pending.copy():
+			self.run_async(
+				photoapp.get_image, aid,
+				on_done=lambda fname, aid=aid: finish(aid, saved, fname),
+				on_error=lambda msg, aid=aid: finish(aid, failed, f"{aid}: {msg}")
 			)
-		except Exception as e:
-			QMessageBox.critical(
+
+	def show_labels_popup(self, assetid):
+		"""Logic for get_image_labels(assetid)"""
+		self.run_async(
+			self._cached_labels, assetid,
+			on_done=lambda labels_data: self._labels_popup(assetid, labels_data),
+			on_error=lambda msg: QMessageBox.critical(
 				self,
 				"Error",
-				f"Could not retrieve labels: {str(e)}"
+				f"Could not retrieve labels: {msg}"
+			)
+		)
+
+	def _labels_popup(self, assetid, labels_data):
+		if not labels_data:
+			QMessageBox.information(
+				self, 
+				"Labels", 
+				"No labels found for this image."
 			)
+			return
+
+		# Format the list of (label, confidence) tuples into a string
+		label_str = "\n".join(
+			[ f"{label}: {conf:.2f}%" for label, conf in labels_data ]
+		)
+		QMessageBox.information(
+			self,
+			f"Labels for asset {assetid}",
+			label_str
+		)
 
 if __name__ == "__main__":
 	CONFIG = "photoapp-config.ini"
@@ -337,6 +620,7 @@ if __name__ == "__main__":
 		sys.exit(2)
 
 	app = QApplication(sys.argv)
+	QPixmapCache.setCacheLimit(65536)	# KiB
 	window = PhotoAppGUI()
 	window.show()
 	sys.exit(app.exec())
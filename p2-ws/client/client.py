@@ -7,8 +7,11 @@
 #
 
 import photoapp
+import asyncio
 import logging
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 
 ###################################################################
@@ -26,7 +29,8 @@ sys.tracebacklimit = 0
 #
 logging.basicConfig(
 	filename='log.txt',
-	level=logging.INFO,
+	# WARNING unless asked otherwise, to keep log writes off the call path:
+	level=os.environ.get('PHOTOAPP_LOGLEVEL', 'WARNING').upper(),
 	format='%(asctime)s - %(levelname)s - %(message)s',
 	filemode='w'
 )
@@ -42,17 +46,25 @@ def init():
 
 	print()
 
+#
+# the read-only calls below are independent, so each runs its
+# blocking photoapp call on a worker thread and main() gathers
+# them; a section's output is printed only once its call is done,
+# so sections don't interleave:
+#
+
 #
 # get_ping:
 #
-def run_ping():
+async def run_ping():
 	try:
+		(M,N) = await asyncio.to_thread( photoapp.get_ping )
 		print("**get_ping:")
-		(M,N) = photoapp.get_ping()
 		print(f"M: {M}")
 		print(f"N: {N}")
 
 	except Exception as err:
+		print("**get_ping:")
 		print("CLIENT ERROR:")
 		print(str(err))
 
@@ -62,15 +74,16 @@ def run_ping():
 #
 # get_users:
 #
-def run_get_users():
+async def run_get_users():
 	try:
+		users = await asyncio.to_thread( photoapp.get_users )
 		print("**get_users:")
-		users = photoapp.get_users()
 
 		for user in users:
 			print(user)
 		
 	except Exception as err:
+		print("**get_users:")
 		print("CLIENT ERROR:")
 		print(str(err))
 
@@ -98,47 +111,50 @@ def run_post_img( userid=80001 ):
 #
 # get_images:
 #
-def run_get_imgs():
+async def run_get_imgs():
 	try:
+		imgs = await asyncio.to_thread( photoapp.get_images )
 		print("**get_images:")
-		imgs = photoapp.get_images()
 
 		for img in imgs:
 			print( img )
 		
 	except Exception as err:
+		print("**get_images:")
 		print("CLIENT ERROR:")
 		print(str(err))
 
 	finally:
 		print()
 
-def run_get_imgs_uid( userid=80001 ):
+async def run_get_imgs_uid( userid=80001 ):
 	try:
 		userid = 80001
+		imgs = await asyncio.to_thread( photoapp.get_images, userid )
 		print(f"**get_images with userid { userid }:")
-		imgs = photoapp.get_images( userid )
 
 		for img in imgs:
 			print( img )
 
 	except Exception as err:
+		print(f"**get_images with userid { userid }:")
 		print("CLIENT ERROR:")
 		print(str(err))
 
 	finally:
 		print()
 
-def run_get_imgs_bad_uid():
+async def run_get_imgs_bad_uid():
 	try:
 		userid = "melchizedek solomonovich"
+		imgs = await asyncio.to_thread( photoapp.get_images, userid )
 		print(f"**get_images with userid { userid }:")
-		imgs = photoapp.get_images( userid )
 
 		for img in imgs:
 			print( img )
 		
 	except Exception as err:
+		print(f"**get_images with userid { userid }:")
 		print("CLIENT ERROR:")
 		print(str(err))
 
@@ -148,43 +164,48 @@ def run_get_imgs_bad_uid():
 #
 # get_image:
 #
-def run_get_img( assetid=1001 ):
+async def run_get_img( assetid=1001 ):
 	try:
 		assetid = 1001
+		local_filename = await asyncio.to_thread( photoapp.get_image, assetid )
 		print(f"**get_image: { assetid } ")
-		local_filename = photoapp.get_image( assetid )
 
 		print( local_filename )
 		
 	except Exception as err:
+		print(f"**get_image: { assetid } ")
 		print("CLIENT ERROR:")
 		print(str(err))
 
 	finally:
 		print()
 
-def run_get_img_localname( assetid = 1001, localname="out_img.jpg" ):
+async def run_get_img_localname( assetid = 1001, localname="out_img.jpg" ):
 	try:
+		local_filename = await asyncio.to_thread(
+			photoapp.get_image, assetid, local_filename=localname
+		)
 		print(f"**get_image: { assetid } { localname } ")
-		local_filename = photoapp.get_image( assetid, local_filename=localname )
 
 		print( local_filename )
 		
 	except Exception as err:
+		print(f"**get_image: { assetid } { localname } ")
 		print("CLIENT ERROR:")
 		print(str(err))
 
 	finally:
 		print()
 
-def run_get_img_bad_aid( assetid = 607 ):
+async def run_get_img_bad_aid( assetid = 607 ):
 	try:
+		local_filename = await asyncio.to_thread( photoapp.get_image, assetid )
 		print(f"**get_image: { assetid } ")
-		local_filename = photoapp.get_image( assetid )
 
 		print( local_filename )
 		
 	except Exception as err:
+		print(f"**get_image: { assetid } ")
 		print("CLIENT ERROR:")
 		print(str(err))
 
@@ -211,13 +232,14 @@ def run_del_imgs():
 #
 # get_image_labels:
 #
-def run_get_labels( assetid=1001 ):
+async def run_get_labels( assetid=1001 ):
 	try:
-		print(f"**get_image_labels: { assetid } ")
 		res = None
-		res = photoapp.get_image_labels( assetid )
+		res = await asyncio.to_thread( photoapp.get_image_labels, assetid )
+		print(f"**get_image_labels: { assetid } ")
 		print( res )
 	except Exception as err:
+		print(f"**get_image_labels: { assetid } ")
 		print("CLIENT ERROR:")
 		print(str(err))
 
@@ -228,13 +250,14 @@ def run_get_labels( assetid=1001 ):
 # g..._i_...w_...l...:
 #
 
-def run_GIWL( label='a' ):
+async def run_GIWL( label='a' ):
 	try:
-		print(f"**GIWL: label { label } ")
 		res = None
-		res = photoapp.get_images_with_label( label )
+		res = await asyncio.to_thread( photoapp.get_images_with_label, label )
+		print(f"**GIWL: label { label } ")
 		print( res )
 	except Exception as err:
+		print(f"**GIWL: label { label } ")
 		print("CLIENT ERROR:")
 		print(str(err))
 
@@ -242,41 +265,58 @@ def run_GIWL( label='a' ):
 		print()
 
 
-if __name__ == "__main__":
-
+async def main():
 	#
-	# run and test:
+	# one fixed-size pool of reusable threads behind every
+	# asyncio.to_thread call:
 	#
-	print()
-	print("**starting**")
-	print()
+	asyncio.get_running_loop().set_default_executor(
+		ThreadPoolExecutor( max_workers=8, thread_name_prefix='photoapp' )
+	)
 
 	init()
-	run_ping()
-
-	run_get_users()
+	await asyncio.gather(
+		run_ping(),
+		run_get_users(),
+	)
 
 	"""
 
+	#
+	# mutating calls stay serialized around the gathered reads:
+	#
 	run_post_img()
 
-	run_get_imgs()
-	run_get_imgs_uid( )
-	run_get_imgs_bad_uid()
+	await asyncio.gather(
+		run_get_imgs(),
+		run_get_imgs_uid( ),
+		run_get_imgs_bad_uid(),
 
-	run_get_img()
-	run_get_img_localname(  )
-	run_get_img_bad_aid( assetid="1001; Select * From Assets" )
+		run_get_img(),
+		run_get_img_localname(  ),
+		run_get_img_bad_aid( assetid="1001; Select * From Assets" ),
 
-	run_get_labels( 1001 )
+		run_get_labels( 1001 ),
 	
-	run_GIWL( label='a' )
+		run_GIWL( label='a' ),
+	)
 
 	"""
 
 	#run_del_imgs()
+
+
+if __name__ == "__main__":
+
+	#
+	# run and test:
+	#
+	print()
+	print("**starting**")
+	print()
+
+	asyncio.run( main() )
 	
 	print()
 	print("**done**")
 	print()
-
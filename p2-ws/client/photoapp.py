@@ -8,11 +8,43 @@
 #	 Northwestern University
 #
 
+import asyncio
+import atexit
+import functools
+import json as _json
 import logging as lg
+import mmap
+import os
+import tempfile
+import time
+from operator import itemgetter
+import urllib.parse
+import zlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from requests.exceptions import HTTPError, ConnectionError, Timeout
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from configparser import ConfigParser
+#
+# optional: orjson parses the (possibly large) JSON responses much
+# faster than the stdlib json module, and serializes request bodies
+# straight to bytes:
+#
+try:
+	import orjson
+	_loads = orjson.loads
+	_dumps = orjson.dumps
+except ImportError:
+	_loads = _json.loads
+	_dumps = lambda obj: _json.dumps( obj ).encode()
+
+#
+# optional: cache idempotent GETs in memory (see _new_session):
+#
+try:
+	import requests_cache
+except ImportError:
+	requests_cache = None
 
 import base64
 
@@ -21,13 +53,95 @@ import base64
 #
 WEB_SERVICE_URL = 'set via call to initialize()'
 
-RETRY_DEF = retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
+#
+# endpoint URLs, built once by initialize(); parameterized endpoints
+# are prefixes to append the (quoted) parameter to:
+#
+URLS = {}
+
+#
+# (connect, read) timeouts in seconds for every request, so a stalled
+# server or dead connection raises Timeout (and is retried) instead
+# of hanging; uploads and the bulk delete get a longer read timeout:
+#
+DEFAULT_TIMEOUT = (3.05, 30)
+LONG_TIMEOUT = (3.05, 120)
+
+#
+# one keep-alive session shared by all API calls, so each call
+# reuses a pooled connection to the web service instead of paying
+# a fresh TCP + TLS handshake; created by initialize():
+#
+SESSION = None
+
+#
+# post_image streams its body from a generator, which a requests-cache
+# CachedSession can't build a cache key for (even with caching
+# disabled), so uploads go through a plain session mounted on the
+# same adapter, sharing its connection pool; SESSION itself if that's
+# already a plain session:
+#
+_UPLOAD_SESSION = None
+
+#
+# GETs and DELETE are retried by urllib3 inside the connection pool
+# (connection failures, read timeouts, and 502/503/504 from a gateway
+# in front of the service), reusing the kept-alive connection; after
+# the last attempt the response is returned as-is for
+# catch_resp_error. A 500 is not retried: the server already retries
+# its own work.
+#
+_GET_RETRY = Retry(
+	total=3,
+	backoff_factor=2,
+	status_forcelist=(502, 503, 504),
+	allowed_methods=frozenset(['GET', 'DELETE']),
+	respect_retry_after_header=True,
+	raise_on_status=False
 )
 
+#
+# POSTs are not retried by urllib3, so post_image and
+# get_image_labels_batch retry connection failures and timeouts
+# themselves: 3 attempts, backing off 2s then 4s:
+#
+_POST_ATTEMPTS = 3
+
+def _retry_post(fn):
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		for attempt in range(1, _POST_ATTEMPTS + 1):
+			try:
+				return fn(*args, **kwargs)
+			except (ConnectionError, Timeout):
+				if attempt == _POST_ATTEMPTS:
+					raise
+				time.sleep(2 ** attempt)
+	return wrapper
+
+#
+# pull a response row's values, in API order, out of its JSON object:
+#
+_USER_FIELDS  = itemgetter( 'userid', 'username', 'givenname', 'familyname' )
+_IMAGE_FIELDS = itemgetter( 'assetid', 'userid', 'localname', 'bucketkey' )
+_LABEL_FIELDS = itemgetter( 'label', 'confidence' )
+_GIWL_FIELDS  = itemgetter( 'assetid', 'label', 'confidence' )
+
+#
+# percent-encode a value for use as one URL path segment, so spaces,
+# '/', '?' or non-ASCII in it can't break or re-route the request:
+#
+def _quote( value ):
+	return urllib.parse.quote( str( value ), safe='' )
+
+#
+# parse a response's JSON body via _loads, straight from the raw
+# bytes: unlike response.json(), this skips the charset sniff and
+# decode to str first (JSON bodies are always UTF-8):
+#
+def _parse( response ):
+	return _loads( response.content )
+
 #
 # Modularized logic for handling response errors
 #
@@ -36,7 +150,7 @@ def catch_resp_error( response ):
 		#
 		# failed:
 		#
-		json = response.json()
+		json = _parse( response )
 		msg = json[ 'message' ]
 		err_msg = f"status code {response.status_code}: {msg}"
 		#
@@ -47,7 +161,7 @@ def catch_resp_error( response ):
 		raise HTTPError(err_msg)
 
 	elif response.status_code == 400:
-		raise ValueError( response.json()[ 'message' ] )
+		raise ValueError( _parse( response )[ 'message' ] )
 
 	else:
 		# 
@@ -70,18 +184,17 @@ def catch_resp_error( response ):
 # NOTE: does not check to make sure we can actually reach the
 # web service. Call get_ping() to check.
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def initialize(client_config_file):
 	"""
 	Initializes local environment for AWS access, returning True
 	if successful and raising an exception if not. Call this 
 	function only once, and call before calling any other API
 	functions.
+
+	All API calls share one HTTP session whose connection pool is
+	sized for about 32 requests in flight at once; callers issuing
+	more concurrently should mount a larger HTTPAdapter on
+	photoapp.SESSION.
 	
 	Parameters
 	----------
@@ -98,12 +211,49 @@ def initialize(client_config_file):
 		#
 		# extract and save URL of web service for other API functions:
 		#
-		global WEB_SERVICE_URL
+		global WEB_SERVICE_URL, URLS, SESSION, _UPLOAD_SESSION
 
 		configur = ConfigParser()
 		configur.read(client_config_file)
 		WEB_SERVICE_URL = configur.get('client', 'webservice')
 
+		URLS = {
+			'ping':         WEB_SERVICE_URL + "/ping",
+			'users':        WEB_SERVICE_URL + "/users",
+			'images':       WEB_SERVICE_URL + "/images",
+			'image':        WEB_SERVICE_URL + "/image/",
+			'labels':       WEB_SERVICE_URL + "/image_labels/",
+			'labels_batch': WEB_SERVICE_URL + "/image_labels_batch",
+			'label_search': WEB_SERVICE_URL + "/images_with_label/",
+		}
+
+		if SESSION is None:
+			SESSION = _new_session()
+			#
+			# all calls go to the one web service host, so few pools but
+			# room for ~32 concurrent connections in it:
+			#
+			adapter = HTTPAdapter(
+				pool_connections=4, pool_maxsize=32, pool_block=False,
+				max_retries=_GET_RETRY
+			)
+			SESSION.mount('http://', adapter)
+			SESSION.mount('https://', adapter)
+			SESSION.headers.update({
+				'Accept': 'application/json',
+				'Connection': 'keep-alive'
+			})
+
+			if requests_cache is not None:
+				_UPLOAD_SESSION = requests.Session()
+				_UPLOAD_SESSION.mount('http://', adapter)
+				_UPLOAD_SESSION.mount('https://', adapter)
+				_UPLOAD_SESSION.headers.update(SESSION.headers)
+			else:
+				_UPLOAD_SESSION = SESSION
+
+			atexit.register(close)
+
 		#
 		# success:
 		#
@@ -115,6 +265,72 @@ def initialize(client_config_file):
 		raise
 
 
+#
+# with requests-cache installed, repeat get_users / get_image_labels
+# / get_images_with_label calls within their expiry are answered from
+# an in-process cache instead of the web service (server
+# Cache-Control headers take precedence); everything else, including
+# /ping and image downloads, is never cached. post_image and
+# delete_images invalidate the cache, but only in this process: a
+# delete elsewhere resets the assetids, which are then reused, so
+# the cache is never shared across processes and expiries are short.
+# Without requests-cache this is a plain requests.Session.
+#
+def _new_session():
+	if requests_cache is None:
+		return requests.Session()
+
+	return requests_cache.CachedSession(
+		backend='memory',
+		allowable_methods=('GET',),
+		cache_control=True,
+		expire_after=requests_cache.DO_NOT_CACHE,
+		urls_expire_after={
+			'*/users': 600,
+			'*/image_labels/*': 60,
+			'*/images_with_label/*': 30,
+			'*': requests_cache.DO_NOT_CACHE,
+		}
+	)
+
+def _invalidate_cache():
+	cache = getattr( SESSION, 'cache', None )
+	if cache is not None:
+		cache.clear()
+
+
+###################################################################
+#
+# close
+#
+# Releases the pooled connections to the web service. Optional;
+# also done at interpreter exit. Call initialize() again before
+# making further API calls.
+#
+def close():
+	"""
+	Closes the shared HTTP session and its pooled connections.
+
+	Parameters
+	----------
+	N/A
+
+	Returns
+	-------
+	N/A
+	"""
+
+	global SESSION, _UPLOAD_SESSION
+
+	if _UPLOAD_SESSION is not None and _UPLOAD_SESSION is not SESSION:
+		_UPLOAD_SESSION.close()
+	_UPLOAD_SESSION = None
+
+	if SESSION is not None:
+		SESSION.close()
+		SESSION = None
+
+
 ###################################################################
 #
 # get_ping
@@ -130,12 +346,6 @@ def initialize(client_config_file):
 # is raised. Exceptions of type HTTPError are from the underlying
 # web service.
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def get_ping():
 	"""
 	Based on the configuration file, retrieves the # of items in the S3 bucket and
@@ -156,17 +366,15 @@ def get_ping():
 	"""
 
 	try:
-		baseurl = WEB_SERVICE_URL
-
-		url = baseurl + "/ping"
+		url = URLS[ 'ping' ]
 
-		response = requests.get(url)
+		response = SESSION.get( url, timeout=DEFAULT_TIMEOUT )
 
 		if response.status_code == 200:
 			#
 			# success
 			#
-			json = response.json()
+			json = _parse( response )
 			M = json['M']
 			N = json['N']
 			return (M, N)
@@ -176,9 +384,6 @@ def get_ping():
 	except Exception as err:
 		lg.error("get_ping():")
 		lg.error(str(err))
-		#
-		# raise exception to trigger retry mechanism if appropriate:
-		#
 		raise
 
 	finally:
@@ -190,12 +395,6 @@ def get_ping():
 #
 # get_users
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def get_users():
 	"""
 	Returns a list of all the users in the database. Each element 
@@ -217,17 +416,15 @@ def get_users():
 	underlying web service.
 	"""
 	try:
-		baseurl = WEB_SERVICE_URL
-
-		url = baseurl + "/users"
+		url = URLS[ 'users' ]
 
-		response = requests.get( url )
+		response = SESSION.get( url, timeout=DEFAULT_TIMEOUT )
 
 		if response.status_code == 200:
 			#
 			# success
 			#
-			json = response.json()
+			json = _parse( response )
 			rows = json['data']
 
 			# 
@@ -235,27 +432,13 @@ def get_users():
 			# let's extract the values and discard the keys
 			# to honor the API's return value:
 			#
-			users = []
-
-			for row in rows:
-				userid = row["userid"]
-				username = row["username"]
-				givenname = row["givenname"]
-				familyname = row["familyname"]
-				#
-				user = (userid, username, givenname, familyname)
-				users.append(user)
-
-			return users
+			return list( map( _USER_FIELDS, rows ) )
 		else:
 			catch_resp_error( response )
 
 	except Exception as err:
 		lg.error("get_users():")
 		lg.error(str(err))
-		#
-		# raise exception to trigger retry mechanism if appropriate:
-		#
 		raise
 
 	finally:
@@ -267,12 +450,6 @@ def get_users():
 #
 # get_images
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def get_images(userid = None):
 	"""
 	Returns a list of all the images in the database. Each element 
@@ -298,19 +475,19 @@ def get_images(userid = None):
 	"""
 
 	try:
-		baseurl = WEB_SERVICE_URL
+		url = URLS[ 'images' ]
 
-		url = baseurl + "/images"
-		if userid:
-			url += f"?userid={ userid }"
-
-		response = requests.get( url )
+		response = SESSION.get(
+			url,
+			params={ 'userid': userid } if userid else None,
+			timeout=DEFAULT_TIMEOUT
+		)
 
 		if response.status_code == 200:
 			#
 			# success
 			#
-			json = response.json()
+			json = _parse( response )
 			rows = json['data']
 
 			#
@@ -318,18 +495,7 @@ def get_images(userid = None):
 			# let's extract the values and discard the keys
 			# to honor the API's return value:
 			#
-			imgs = []
-
-			for row in rows:
-				assetid	  = row["assetid"]
-				userid    = row["userid"]
-				localname = row["localname"]
-				bucketkey = row["bucketkey"]
-				#
-				img = ( assetid, userid, localname, bucketkey )
-				imgs.append( img )
-
-			return imgs
+			return list( map( _IMAGE_FIELDS, rows ) )
 		else:
 			catch_resp_error( response )
 
@@ -342,16 +508,17 @@ def get_images(userid = None):
 		# nothing to do
 		pass
 
+#
+# bytes of image read per base64-encoded piece of the upload body;
+# must be a multiple of 3:
+#
+_B64_ENC_CHUNK = 57 * 1024
+
 ###################################################################
 #
 # post_image
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
+@_retry_post
 def post_image(userid, local_filename):
 	"""
 	Uploads an image to S3 with a unique name, allowing the same local
@@ -375,40 +542,63 @@ def post_image(userid, local_filename):
 	image's assetid upon success, raises an exception on error
 	"""
 	try:
-		baseurl = WEB_SERVICE_URL
 		# `:` is only needed for JS-side formal parameter
-		url = baseurl + "/image" + f"/{ userid }"
+		url = URLS[ 'image' ] + _quote( userid )
+
+		# strip parent directories for filename to be recorded in DB
+		pure_localname = os.path.basename( local_filename )
 
 		#
-		# first, open the file and read in the bytes
+		# post the same JSON message as before, {local_filename, data},
+		# but generate the body as the file is read: each piece is a
+		# multiple of 3 bytes, so its base64 encoding joins cleanly
+		# with the next, and neither the raw nor the encoded image is
+		# ever held whole in memory (sent with chunked encoding). The
+		# file is mmap'd and encoded straight from memoryview slices,
+		# so reading it makes no intermediate bytes copies:
 		#
-		img_bytes = None
-		with open( local_filename, 'rb' ) as infile:
-			img_bytes = infile.read()
+		def body( infile ):
+			yield b'{"local_filename": ' + _dumps( pure_localname ) \
+				+ b', "data": "'
+			if os.fstat( infile.fileno() ).st_size > 0:	 # can't mmap empty file
+				with mmap.mmap( infile.fileno(), 0, access=mmap.ACCESS_READ ) as mm:
+					view = memoryview( mm )
+					try:
+						for i in range( 0, len( view ), _B64_ENC_CHUNK ):
+							yield base64.b64encode( view[ i:i+_B64_ENC_CHUNK ] )
+					finally:
+						view.release()
+			yield b'"}'
 
 		#
-		# now encode as base64 string, build msg to embed in the request,
-		# and post request to the web service in JSON format:
+		# gzip the body on the fly (level 1: cheap on CPU, and base64
+		# text still shrinks well); express.json inflates it:
 		#
-		enc_bytes = base64.b64encode( img_bytes )
-		img_str   = enc_bytes.decode()
+		def gzipped( pieces ):
+			gz = zlib.compressobj( 1, zlib.DEFLATED, 31 )
+			for piece in pieces:
+				out = gz.compress( piece )
+				if out:
+					yield out
+			yield gz.flush()
 
- 		# strip parent directories for filename to be recorded in DB
-		pure_localname = local_filename[ local_filename.rfind('/')+1: ]
-
-		data = \
-		{ \
-			"local_filename": pure_localname, \
-			"data": img_str, \
-		}
-
-		response = requests.post( url, json=data )
+		with open( local_filename, 'rb' ) as infile:
+			response = _UPLOAD_SESSION.post(
+				url,
+				data=gzipped( body( infile ) ),
+				headers={
+					'Content-Type': 'application/json',
+					'Content-Encoding': 'gzip'
+				},
+				timeout=LONG_TIMEOUT
+			)
 
 		if response.status_code == 200:
 			#
 			# success
 			#
-			json = response.json()
+			_invalidate_cache()
+			json = _parse( response )
 			assetid = json[ "assetid" ]
 			return assetid
 		else:
@@ -423,16 +613,41 @@ def post_image(userid, local_filename):
 		# nothing to do
 		pass
 
+#
+# decode a base64 string a piece at a time (piece length a multiple
+# of 4, so each decodes on its own), rather than materializing all
+# the decoded bytes at once:
+#
+_B64_CHUNK = 64 * 1024
+
+def _b64decode_chunks( img_str ):
+	for i in range( 0, len( img_str ), _B64_CHUNK ):
+		yield base64.b64decode( img_str[ i:i+_B64_CHUNK ] )
+
+#
+# write the image's chunks (an iterable of bytes) to a temp file
+# alongside the target and rename it into place, so a failed or
+# concurrent download never leaves a partial image under localname:
+#
+def _write_image( localname, chunks ):
+	fd, tmpname = tempfile.mkstemp(
+		dir=os.path.dirname( os.path.abspath( localname ) ),
+		prefix=".photoapp-"
+	)
+	try:
+		with os.fdopen( fd, "wb" ) as outfile:
+			for chunk in chunks:
+				outfile.write( chunk )
+		os.replace( tmpname, localname )
+	except BaseException:
+		os.unlink( tmpname )
+		raise
+
+
 ###################################################################
 #
 # get_image
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def get_image(assetid, local_filename = None):
 	"""
 	Downloads the image from S3 denoted by the provided asset. If a
@@ -458,32 +673,47 @@ def get_image(assetid, local_filename = None):
 	"""
 
 	try:
-		baseurl = WEB_SERVICE_URL
-		url = baseurl + "/image" + f"/{ assetid }"
+		url = URLS[ 'image' ] + _quote( assetid )
 
-		response = requests.get( url )
+		#
+		# ask for the raw bytes, which are streamed to disk; a server
+		# that only speaks JSON answers with base64 in the body instead:
+		#
+		response = SESSION.get(
+			url,
+			headers={ 'Accept': 'application/octet-stream, application/json;q=0.9' },
+			stream=True,
+			timeout=DEFAULT_TIMEOUT
+		)
+
+		with response:
+			if response.status_code != 200:
+				catch_resp_error( response )
+				return None
 
-		if response.status_code == 200:
 			#
 			# success
 			#
-			json = response.json()
-			img_str = json[ "data" ]
-			img_bytes = base64.b64decode( img_str )
+			if response.headers.get( 'Content-Type', '' ) \
+					.startswith( 'application/octet-stream' ):
+				remote_name = urllib.parse.unquote(
+					response.headers[ 'X-Local-Filename' ]
+				)
+				chunks = response.iter_content( chunk_size=64 * 1024 )
+			else:
+				json = _parse( response )
+				remote_name = json[ "local_filename" ]
+				chunks = _b64decode_chunks( json[ "data" ] )
 
 			localname = \
-				local_filename[ local_filename.rfind('/')+1: ] \
+				os.path.basename( local_filename ) \
 				if local_filename \
-				else json[ "local_filename" ]
+				else remote_name
 
-			with open( localname, "wb" ) as outfile:
-				outfile.write( img_bytes )
+			_write_image( localname, chunks )
 
 			return localname
 
-		else:
-			catch_resp_error( response )
-
 	except Exception as err:
 		lg.error("get_image():")
 		lg.error(str(err))
@@ -497,12 +727,6 @@ def get_image(assetid, local_filename = None):
 #
 # get_image_labels
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def get_image_labels(assetid):
 	"""
 	When an image is uploaded to S3, Rekognition is
@@ -514,7 +738,9 @@ def get_image_labels(assetid):
 	The tuples are ordered by label, ascending. If an error occurs
 	an exception is raised; an invalid assetid is considered a
 	ValueError, "no such assetid". Exceptions of type HTTPError 
-	are from the underlying web service.
+	are from the underlying web service. To get the labels of many
+	images, call get_image_labels_batch once rather than this
+	function in a loop.
 
 	Parameters
 	----------
@@ -530,17 +756,15 @@ def get_image_labels(assetid):
 	"""
 
 	try:
-		baseurl = WEB_SERVICE_URL
-
-		url = baseurl + "/image_labels" + f"/{ assetid }"
+		url = URLS[ 'labels' ] + _quote( assetid )
 
-		response = requests.get( url )
+		response = SESSION.get( url, timeout=DEFAULT_TIMEOUT )
 
 		if response.status_code == 200:
 			#
 			# success
 			#
-			json = response.json()
+			json = _parse( response )
 			records = json['data']
 
 			#
@@ -548,7 +772,7 @@ def get_image_labels(assetid):
 			# let's extract the values and discard the keys
 			# to honor the API's return value:
 			#
-			return [ ( rcd[ "label" ], rcd[ "confidence" ] ) for rcd in records ]
+			return list( map( _LABEL_FIELDS, records ) )
 
 		else:
 			catch_resp_error( response )
@@ -563,16 +787,67 @@ def get_image_labels(assetid):
 		pass
 
 
+###################################################################
+#
+# get_image_labels_batch
+#
+@_retry_post
+def get_image_labels_batch(assetids):
+	"""
+	Batch version of get_image_labels: retrieves the labels of all
+	the given images with a single request to the web service. If an
+	error occurs an exception is raised; if any assetid is invalid
+	this is a ValueError, "no such assetid". Exceptions of type
+	HTTPError are from the underlying web service.
+
+	Parameters
+	----------
+	assetids of images to retrieve labels for
+
+	Returns
+	-------
+	a dict mapping each assetid to its list of labels, where each
+	element of a list is a tuple of the form (label, confidence)
+	ordered by label, as returned by get_image_labels
+	"""
+
+	try:
+		url = URLS[ 'labels_batch' ]
+
+		response = SESSION.post(
+			url,
+			data=_dumps( { 'assetids': list( assetids ) } ),
+			headers={ 'Content-Type': 'application/json' },
+			timeout=DEFAULT_TIMEOUT
+		)
+
+		if response.status_code == 200:
+			#
+			# success; JSON object keys are strings, so turn them
+			# back into assetids:
+			#
+			json = _parse( response )
+			return {
+				int( assetid ): list( map( _LABEL_FIELDS, records ) )
+				for assetid, records in json[ 'data' ].items()
+			}
+		else:
+			catch_resp_error( response )
+
+	except Exception as err:
+		lg.error("get_image_labels_batch():")
+		lg.error(str(err))
+		raise
+
+	finally:
+		# nothing to do
+		pass
+
+
 ###################################################################
 #
 # get_images_with_label
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def get_images_with_label(label):
 	"""
 	When an image is uploaded to S3, Rekognition is
@@ -602,31 +877,23 @@ def get_images_with_label(label):
 	"""
 
 	try:
-		baseurl = WEB_SERVICE_URL
+		url = URLS[ 'label_search' ] + _quote( label )
 
-		url = baseurl + "/images_with_label" + f"/{ label }"
-
-		response = requests.get( url )
+		response = SESSION.get( url, timeout=DEFAULT_TIMEOUT )
 
 		if response.status_code == 200:
 			#
 			# success
 			#
-			json = response.json()
+			json = _parse( response )
 			rows = json[ "data" ]
-			return [ \
-				( row[ 'assetid' ], row[ 'label' ], row[ 'confidence' ] ) \
-				for row in rows \
-			]
+			return list( map( _GIWL_FIELDS, rows ) )
 		else:
 			catch_resp_error( response )
 
 	except Exception as err:
 		lg.error("GIWL():")
 		lg.error(str(err))
-		#
-		# raise exception to trigger retry mechanism if appropriate:
-		#
 		raise
 
 	finally:
@@ -638,12 +905,6 @@ def get_images_with_label(label):
 #
 # delete_images
 #
-@retry(
-	stop=stop_after_attempt(3), 
-	wait=wait_exponential(multiplier=1, min=2, max=30),
-	retry=retry_if_exception_type((ConnectionError, Timeout)),
-	reraise=True
-)
 def delete_images():
 	"""
 	Delete all images and associated labels from the database and 
@@ -665,28 +926,25 @@ def delete_images():
 	"""
 
 	try:
-		baseurl = WEB_SERVICE_URL
-
-		url = baseurl + "/images"
+		url = URLS[ 'images' ]
 
-		response = requests.delete( url )
+		response = SESSION.delete( url, timeout=LONG_TIMEOUT )
+		_invalidate_cache()
 
 		if response.status_code == 200:
 			#
-			# success
+			# success; the server only sends 200 (message "success")
+			# when everything was deleted, so the body adds nothing:
 			#
-			json = response.json()
-			msg = json[ 'message' ]
-			return "success" in msg.lower();
+			if lg.getLogger().isEnabledFor( lg.DEBUG ):
+				lg.debug( response.text )
+			return True
 		else:
 			catch_resp_error( response )
 
 	except Exception as err:
-		lg.error("get_users():")
+		lg.error("delete_images():")
 		lg.error(str(err))
-		#
-		# raise exception to trigger retry mechanism if appropriate:
-		#
 		raise
 
 	finally:
@@ -694,4 +952,119 @@ def delete_images():
 		pass
 
 
+###################################################################
+#
+# async batch API
+#
+# get_images_async and get_image_labels_async are batch versions of
+# get_image and get_image_labels: the requests for all the assetids
+# overlap on one aiohttp session (at most `concurrency` in flight)
+# instead of running one after another. aiohttp is only needed if
+# these functions are used.
+#
+async def _fetch_all( urls, handle, concurrency=16 ):
+	import aiohttp  # only needed for the async batch API
+
+	sem = asyncio.Semaphore( concurrency )
+	connector = aiohttp.TCPConnector( limit=32, limit_per_host=32 )
+
+	timeout = aiohttp.ClientTimeout(
+		sock_connect=DEFAULT_TIMEOUT[0], sock_read=DEFAULT_TIMEOUT[1]
+	)
+
+	async with aiohttp.ClientSession(
+		connector=connector,
+		headers={ 'Accept': 'application/json' },
+		timeout=timeout
+	) as session:
+
+		async def fetch_one( url ):
+			async with sem:
+				async with session.get( url ) as response:
+					status = response.status
+					if status not in ( 200, 400, 500 ):
+						# no JSON-based response, same as catch_resp_error:
+						response.raise_for_status()
+					json = await response.json( content_type=None, loads=_loads )
+
+			if status == 200:
+				return await handle( json )
+			elif status == 400:
+				raise ValueError( json[ 'message' ] )
+			else:
+				raise HTTPError( f"status code {status}: {json[ 'message' ]}" )
+
+		return await asyncio.gather(
+			*[ fetch_one( url ) for url in urls ],
+			return_exceptions=True
+		)
+
+
+async def get_images_async( assetids ):
+	"""
+	Downloads the images denoted by the given assetids concurrently,
+	each saved under the local filename recorded in the database
+	(as get_image does with no local_filename).
+
+	Parameters
+	----------
+	assetids of images to download
+
+	Returns
+	-------
+	a list in the same order as assetids, where each element is the
+	local filename of that image, or the exception raised for it (an
+	invalid assetid is a ValueError, "no such assetid")
+	"""
+
+	loop = asyncio.get_running_loop()
+
+	async def save( json ):
+		#
+		# decode + write off the event loop, so other responses
+		# keep flowing meanwhile:
+		#
+		localname = json[ "local_filename" ]
+		await loop.run_in_executor(
+			None, _write_image, localname, _b64decode_chunks( json[ "data" ] )
+		)
+		return localname
+
+	results = await _fetch_all(
+		[ URLS[ 'image' ] + _quote( assetid ) for assetid in assetids ], save
+	)
+	for err in results:
+		if isinstance( err, Exception ):
+			lg.error("get_images_async():")
+			lg.error(str(err))
+	return results
+
+
+async def get_image_labels_async( assetids ):
+	"""
+	Retrieves the labels of the images denoted by the given assetids
+	concurrently (see get_image_labels).
+
+	Parameters
+	----------
+	assetids of images to retrieve labels for
+
+	Returns
+	-------
+	a list in the same order as assetids, where each element is that
+	image's list of (label, confidence) tuples, or the exception
+	raised for it (an invalid assetid is a ValueError, "no such
+	assetid")
+	"""
 
+	async def labels( json ):
+		return list( map( _LABEL_FIELDS, json[ 'data' ] ) )
+
+	results = await _fetch_all(
+		[ URLS[ 'labels' ] + _quote( assetid ) for assetid in assetids ], labels
+	)
+	for err in results:
+		if isinstance( err, Exception ):
+			lg.error("get_image_labels_async():")
+			lg.error(str(err))
+	return results
@@ -10,6 +10,13 @@ import photoapp
 import unittest
 import sys
 import logging
+import base64
+import gzip
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
 
 
 ############################################################
@@ -57,6 +64,78 @@ class PhotoappTests(unittest.TestCase):
     print("test passed!")
 
 
+############################################################
+#
+# Upload tests, against a local stand-in for post /image so
+# the streamed, gzip'd body can be checked without AWS
+#
+class FakeImageHandler(BaseHTTPRequestHandler):
+  def do_POST(self):
+    body = b''
+    while True:  # body is sent with chunked encoding
+      n = int(self.rfile.readline().strip(), 16)
+      if n == 0:
+        self.rfile.readline()
+        break
+      body += self.rfile.read(n)
+      self.rfile.readline()
+
+    if self.headers.get('Content-Encoding') == 'gzip':
+      body = gzip.decompress(body)
+    self.server.received = json.loads(body)
+
+    reply = json.dumps({'message': 'success', 'assetid': 1001}).encode()
+    self.send_response(200)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(reply)))
+    self.end_headers()
+    self.wfile.write(reply)
+
+  def log_message(self, *args):
+    pass
+
+
+@unittest.skipIf(photoapp.requests_cache is None, "requests-cache not installed")
+class UploadTests(unittest.TestCase):
+
+  def setUp(self):
+    self.server = HTTPServer(('127.0.0.1', 0), FakeImageHandler)
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    self.saved = (photoapp.WEB_SERVICE_URL, photoapp.URLS)
+    self.tmpdir = tempfile.TemporaryDirectory()
+    config = os.path.join(self.tmpdir.name, 'client-config.ini')
+    with open(config, 'w') as f:
+      f.write(f"[client]\nwebservice=http://127.0.0.1:{self.server.server_port}\n")
+    photoapp.initialize(config)
+
+  def tearDown(self):
+    photoapp.close()
+    photoapp.WEB_SERVICE_URL, photoapp.URLS = self.saved
+    self.server.shutdown()
+    self.server.server_close()
+    self.tmpdir.cleanup()
+
+  def test_post_image_cached_session(self):
+    print()
+    print("** test_post_image_cached_session **")
+
+    self.assertIsInstance(photoapp.SESSION, photoapp.requests_cache.CachedSession)
+
+    data = os.urandom(100000)
+    filename = os.path.join(self.tmpdir.name, 'upload.jpg')
+    with open(filename, 'wb') as f:
+      f.write(data)
+
+    assetid = photoapp.post_image(80001, filename)
+
+    self.assertEqual(assetid, 1001)
+    self.assertEqual(self.server.received['local_filename'], 'upload.jpg')
+    self.assertEqual(base64.b64decode(self.server.received['data']), data)
+
+    print("test passed!")
+
+
 ############################################################
 #
 # main
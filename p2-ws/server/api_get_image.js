@@ -16,6 +16,7 @@ const { ValueError } = require( "./helper.js" );
 const pRetry = (...args) => import('p-retry').then(({default: pRetry}) => pRetry(...args));
 
 const { GetObjectCommand } = require("@aws-sdk/client-s3");
+const { pipeline } = require( "stream/promises" );
 
 module.exports = { get_image };
 
@@ -33,6 +34,11 @@ module.exports = { get_image };
  * resulting in a status code 400 with a message "no such assetid"
  * and a userid of -1; the other values are undefined.
  *
+ * If the request prefers application/octet-stream (Accept header),
+ * the image bytes are instead streamed from S3 as the response body,
+ * with the local filename (URI-encoded) in the X-Local-Filename
+ * header and the userid in X-Userid; errors are still sent as JSON.
+ *
  * @param assetid (required URL parameter) of image to download
  * @returns JSON {message: string, userid: int, local_filename: string,
  data: base64-encoded string}
@@ -83,7 +89,7 @@ get_image( request, response )
 	}
 
 	async function
-	download_image_str( bkt_key )
+	download_image( bkt_key )
 	{
 		try
 		{
@@ -96,17 +102,15 @@ get_image( request, response )
 			const cmd = new GetObjectCommand( cmd_params );
 			let bkt = get_bucket();
 			const img_data = await bkt.send( cmd );
-			const img_bytes = img_data.Body;
-			const img_str = await img_bytes.transformToString( 'base64' );
 
-			return img_str;
+			return img_data;
 		}
 		catch ( err )
 		{
 			//
 			// exception:
 			//
-			console.log( "ERROR in get_image.download_image_str():" );
+			console.log( "ERROR in get_image.download_image():" );
 			console.log( err.message );
 			throw err;
 		}
@@ -128,8 +132,32 @@ get_image( request, response )
 		const [ userid, db_localname, bkt_key ] =
 			[ row[ 'userid' ], row[ 'localname' ], row[ 'bucketkey' ] ];
 
-		/* Retrive image from bucket and encode as string */
-		const img_str = await download_image_str( bkt_key );
+		const img_data = await download_image( bkt_key );
+
+		const wants_raw =
+			request.accepts( [ 'application/json', 'application/octet-stream' ] )
+				=== 'application/octet-stream';
+
+		if ( wants_raw )
+		{
+			/* Stream image bytes straight through, no base64 / JSON */
+			response.set(
+				{
+					'Content-Type':     'application/octet-stream',
+					'X-Local-Filename': encodeURIComponent( db_localname ),
+					'X-Userid':         String( userid ),
+				}
+			);
+			if ( img_data.ContentLength !== undefined )
+				response.set( 'Content-Length', String( img_data.ContentLength ) );
+
+			await pipeline( img_data.Body, response );
+			console.log( "success" );
+			return;
+		}
+
+		/* Encode image as string */
+		const img_str = await img_data.Body.transformToString( 'base64' );
 
 		let local_filename = db_localname;
 
@@ -152,6 +180,13 @@ get_image( request, response )
 		console.log("ERROR in get_image():");
 		console.log(err.message);
 
+		if ( response.headersSent )
+		{
+			// failed mid-stream, too late for a JSON error:
+			response.destroy( err );
+			return;
+		}
+
 		const stat = err instanceof ValueError ? 400 : 500;
 		response.status( stat ).json(
 			{
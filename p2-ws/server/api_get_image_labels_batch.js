@@ -0,0 +1,188 @@
+//
+// API function: post /image_labels_batch
+//
+// Returns the labels of several images (identified by asset IDs) in
+// one request.
+//
+// Authors:
+//	 Jacob Wang
+//	 Northwestern University
+//
+
+const { get_dbConn } = require('./helper.js');
+const { ValueError } = require( "./helper.js" );
+//
+// p_retry requires the use of a dynamic import:
+// const pRetry = require('p-retry');
+//
+const pRetry = (...args) => import('p-retry').then(({default: pRetry}) => pRetry(...args));
+
+module.exports = { get_image_labels_batch };
+
+/**
+ * get_image_labels_batch
+ *
+ * @description batch version of get /image_labels: given a list of
+ * image assetids in the JSON request body, retrieves the labels of
+ * all those images with one round-trip. If successful the labels are
+ * returned as a JSON object of the form {message: ..., data: ...}
+ * where message is "success" and data maps each requested assetid
+ * to a list of dictionary-like objects of the form
+ * {"label": string, "confidence": int}, ordered by label. If an
+ * error occurs, status code of 500 is sent where JSON object's
+ * message is the error message and data is empty {}. A malformed
+ * body, or any assetid that does not exist, is considered a
+ * client-side error, resulting in status code 400 (message "no such
+ * assetid" for the latter) and an empty {}.
+ *
+ * @param assetids (required body parameter) list of integer assetids
+ * @returns JSON {message: string, data: {assetid: [object, ...], ...}}
+ */
+async function get_image_labels_batch( request, response )
+{
+	let dbConn = null;
+
+	async function
+	validate_assetids( assetids )
+	{
+		let lookup_sql = `
+			Select assetid
+			From assets
+			Where assetid In (?);
+		`;
+		try
+		{
+			console.log( "executing SQL..." );
+
+			// query(), not execute(): expands the array into the In list
+			let [ rows, _colinfo ] = await dbConn.query( lookup_sql, [ assetids, ] );
+
+			if ( rows.length < new Set( assetids ).size )
+			{
+				throw new ValueError( "no such assetid" );
+			}
+		}
+		catch ( err )
+		{
+			//
+			// exception:
+			//
+			console.log( "ERROR in get_image_labels_batch.validate_assetids():" );
+			console.log( err.message );
+
+			throw err;	// re-raise exception to trigger retry mechanism
+		}
+	}
+
+	async function
+	fetch_labels( assetids )
+	{
+		let lookup_sql = `
+			Select assetid, label, confidence
+			From labels
+			Where assetid In (?)
+			Order By assetid Asc, label Asc;
+		`;
+		try
+		{
+			console.log( "executing SQL..." );
+
+			const [ rows, _colinfo ] = await dbConn.query( lookup_sql, [ assetids, ] );
+
+			console.log( `done, retrieved ${rows.length} rows` );
+
+			const records = {};
+			for ( const assetid of assetids )
+			{
+				records[ assetid ] = [];
+			}
+			for ( const row of rows )
+			{
+				records[ row[ 'assetid' ] ].push(
+					{
+						label: row[ 'label' ],
+						confidence: parseInt( row[ 'confidence' ] )
+					}
+				);
+			}
+			return records;
+		}
+		catch ( err )
+		{
+			//
+			// exception:
+			//
+			console.log( "ERROR in get_image_labels_batch.fetch_labels():" );
+			console.log( err.message );
+
+			throw err;	// re-raise exception to trigger retry mechanism
+		}
+	}
+
+	try
+	{
+		console.log( "**Call to post /image_labels_batch..." );
+
+		const body = request.body || {};
+		if ( !Array.isArray( body.assetids ) )
+		{
+			throw new ValueError( "assetids must be a list" );
+		}
+		const assetids = body.assetids.map( aid => parseInt( aid ) );
+		if ( assetids.some( aid => Number.isNaN( aid ) ) )
+		{
+			throw new ValueError( "no such assetid" );
+		}
+
+		let records = {};
+
+		if ( assetids.length > 0 )
+		{
+			dbConn = await get_dbConn();
+
+			await pRetry(
+				() => validate_assetids( assetids ),
+				{ retries: 2 }
+			);
+
+			records = await pRetry(
+				() => fetch_labels( assetids ),
+				{ retries: 2 }
+			);
+		}
+
+		//
+		// success, return data in JSON format:
+		//
+		console.log( "success, sending response..." );
+
+		const scs_str = "success";
+		response.json(
+			{
+				message: scs_str,
+				data:    records,
+			}
+		);
+	}
+	catch ( err )
+	{
+		//
+		// exception:
+		//
+		console.log( "ERROR:" );
+		console.log( err.message );
+		const stat = err instanceof ValueError ? 400 : 500; 
+		response.status( stat ).json(
+			{
+				message: err.message,
+				data:    {},
+			}
+		);
+	}
+	finally
+	{
+		if ( dbConn )
+			await dbConn.end();
+	}
+
+};
@@ -27,8 +27,8 @@ const express = require('express');
 const app = express();
 const config = require('./config.js');
 
-// support larger image uploads/downloads:
-app.use(express.json({ strict: false, limit: "50mb" }));
+// support larger image uploads/downloads, gzip'd or not:
+app.use(express.json({ strict: false, limit: "50mb", inflate: true }));
 
 
 /**
@@ -127,6 +127,9 @@ app.delete( "/images", delete_images_file.delete_images );
 const get_image_labels_file = require( "./api_get_image_labels.js" );
 app.get( "/image_labels/:assetid", get_image_labels_file.get_image_labels );
 
+const get_image_labels_batch_file = require( "./api_get_image_labels_batch.js" );
+app.post( "/image_labels_batch", get_image_labels_batch_file.get_image_labels_batch );
+
 const GIWL_file = require( "./api_get_images_with_label.js" );
 app.get( "/images_with_label/:label", GIWL_file.get_images_with_label );
 